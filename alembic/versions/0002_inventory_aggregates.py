@@ -0,0 +1,116 @@
+"""Contrainte de stock, agrégats (rollup journalier, compteurs) et index de recherche
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 19:46:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copie figée de app/db/search.py au moment de la migration
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, content='products', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_products_description_trgm ON products USING gin (description gin_trgm_ops)",
+]
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.create_check_constraint('ck_products_quantity_non_negative', 'quantity >= 0')
+    op.create_index('ix_stock_movements_timestamp', 'stock_movements', ['timestamp'], unique=False)
+
+    op.create_table('movement_daily_rollup',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('entries', sa.Integer(), nullable=False),
+    sa.Column('exits', sa.Integer(), nullable=False),
+    sa.Column('entry_count', sa.Integer(), nullable=False),
+    sa.Column('exit_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    op.create_index('ix_movement_daily_rollup_product_day', 'movement_daily_rollup', ['product_id', 'day'], unique=False)
+    # Remplissage depuis l'historique existant ; mouvements de produits supprimés sous product_id 0
+    op.execute(
+        "INSERT INTO movement_daily_rollup (day, product_id, entries, exits, entry_count, exit_count) "
+        "SELECT date(timestamp), COALESCE(product_id, 0), "
+        "SUM(CASE WHEN type = 'IN' THEN quantity ELSE 0 END), "
+        "SUM(CASE WHEN type = 'OUT' THEN quantity ELSE 0 END), "
+        "SUM(CASE WHEN type = 'IN' THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN type = 'OUT' THEN 1 ELSE 0 END) "
+        "FROM stock_movements "
+        "GROUP BY date(timestamp), COALESCE(product_id, 0)"
+    )
+
+    op.create_table('inventory_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('total_products', sa.Integer(), nullable=False),
+    sa.Column('total_stock', sa.Integer(), nullable=False),
+    sa.Column('total_stock_value', sa.Float(), nullable=False),
+    sa.Column('low_stock_count', sa.Integer(), nullable=False),
+    sa.Column('total_entries', sa.Integer(), nullable=False),
+    sa.Column('total_exits', sa.Integer(), nullable=False),
+    sa.Column('entry_quantity', sa.Integer(), nullable=False),
+    sa.Column('exit_quantity', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Ligne unique créée avec la table, depuis l'existant (les écritures ne font que des deltas)
+    op.execute(
+        "INSERT INTO inventory_counters (id, total_products, total_stock, total_stock_value, "
+        "low_stock_count, total_entries, total_exits, entry_quantity, exit_quantity) "
+        "SELECT 1, "
+        "(SELECT COUNT(*) FROM products), "
+        "(SELECT COALESCE(SUM(quantity), 0) FROM products), "
+        "(SELECT COALESCE(SUM(price * quantity), 0.0) FROM products), "
+        "(SELECT COUNT(*) FROM products WHERE quantity < min_stock), "
+        "(SELECT COUNT(*) FROM stock_movements WHERE type = 'IN'), "
+        "(SELECT COUNT(*) FROM stock_movements WHERE type = 'OUT'), "
+        "(SELECT COALESCE(SUM(quantity), 0) FROM stock_movements WHERE type = 'IN'), "
+        "(SELECT COALESCE(SUM(quantity), 0) FROM stock_movements WHERE type = 'OUT')"
+    )
+
+    dialect = op.get_bind().dialect.name
+    for statement in {"sqlite": SQLITE_SEARCH_DDL, "postgresql": POSTGRES_SEARCH_DDL}.get(dialect, []):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("products_fts_ai", "products_fts_ad", "products_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS products_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_products_description_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_products_name_trgm")
+
+    op.drop_table('inventory_counters')
+    op.drop_index('ix_movement_daily_rollup_product_day', table_name='movement_daily_rollup')
+    op.drop_table('movement_daily_rollup')
+    op.drop_index('ix_stock_movements_timestamp', table_name='stock_movements')
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.drop_constraint('ck_products_quantity_non_negative', type_='check')
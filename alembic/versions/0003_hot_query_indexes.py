@@ -0,0 +1,35 @@
+"""Index des requêtes fréquentes (historique, rapports, alertes de stock)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 19:47:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Historique d'un produit trié par date, statistiques par type sur une période
+    op.create_index('ix_stock_movements_product_id_timestamp', 'stock_movements', ['product_id', 'timestamp'], unique=False)
+    op.create_index('ix_stock_movements_type_timestamp', 'stock_movements', ['type', 'timestamp'], unique=False)
+    op.create_index('ix_stock_movements_user_id', 'stock_movements', ['user_id'], unique=False)
+    # Filtres par catégorie et seuils de stock
+    op.create_index('ix_products_category_id', 'products', ['category_id'], unique=False)
+    op.create_index('ix_products_quantity', 'products', ['quantity'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_quantity', table_name='products')
+    op.drop_index('ix_products_category_id', table_name='products')
+    op.drop_index('ix_stock_movements_user_id', table_name='stock_movements')
+    op.drop_index('ix_stock_movements_type_timestamp', table_name='stock_movements')
+    op.drop_index('ix_stock_movements_product_id_timestamp', table_name='stock_movements')
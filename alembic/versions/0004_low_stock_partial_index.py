@@ -0,0 +1,35 @@
+"""Index partiels des produits sous leur seuil d'alerte
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 20:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+LOW_STOCK = sa.text('quantity < min_stock')
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_low_stock', 'products', ['id'], unique=False,
+                    sqlite_where=LOW_STOCK, postgresql_where=LOW_STOCK)
+    op.create_index('ix_products_low_stock_category', 'products', ['category_id', 'id'], unique=False,
+                    sqlite_where=LOW_STOCK, postgresql_where=LOW_STOCK)
+    # Sans statistiques, SQLite peut préférer ix_products_category_id à l'index partiel
+    op.execute('ANALYZE products')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_low_stock_category', table_name='products')
+    op.drop_index('ix_products_low_stock', table_name='products')
@@ -0,0 +1,44 @@
+"""Images stockées par contenu (SHA-256) avec comptage de références
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 22:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stored_images',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('extension', sa.String(length=10), nullable=False),
+    sa.Column('content_type', sa.String(length=50), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    # batch : SQLite ne sait pas ajouter une clé étrangère à une table existante
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.add_column(sa.Column('image_hash', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('fk_products_image_hash', 'stored_images', ['image_hash'], ['sha256'])
+        batch_op.create_index('ix_products_image_hash', ['image_hash'], unique=False)
+    # Les images déjà envoyées (noms UUID) gardent image_url sans image_hash
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('products') as batch_op:
+        batch_op.drop_index('ix_products_image_hash')
+        batch_op.drop_constraint('fk_products_image_hash', type_='foreignkey')
+        batch_op.drop_column('image_hash')
+    op.drop_table('stored_images')
@@ -1,13 +1,18 @@
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.models import models
 from app.schemas import schemas
-from app.db.database import SessionLocal
+from app.db.database import get_db
+from app.db.async_database import get_async_db
+from app.authentification.hashing import hash_password, verify_and_update
+from app.authentification.principals import cached_principal, fetch_principal
+from app.core.cache import MISSING
 from app.core.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -18,62 +23,84 @@ ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def _principal_id(token: str) -> int:
+    # Décodage du JWT sur la boucle, sans accès à la base
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         user_id: int = payload.get("user_id")
         
         if username is None or user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
         
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
     
-    from app.models import models
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    return user_id
+
+
+def _active_principal(user):
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     
-    return user 
+    return user
+
+
+# --- Utilisateur courant ---
+# Une dépendance par type de session : la lecture de users (cache manquant) passe par la session
+# de la requête, partagée avec le handler (cache des dépendances FastAPI), donc une seule connexion.
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    # Routes async (AsyncSession) : aucun passage par le pool de threads
+    user_id = _principal_id(token)
+    user = cached_principal(user_id)
+    if user is MISSING:
+        user = await db.run_sync(fetch_principal, user_id)
+    return _active_principal(user)
+
+
+async def get_current_user_sync(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    # Routes synchrones (Session) : seule la lecture de users part dans le pool de threads
+    user_id = _principal_id(token)
+    user = cached_principal(user_id)
+    if user is MISSING:
+        user = await run_in_threadpool(fetch_principal, db, user_id)
+    return _active_principal(user)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hash_password(password)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(models.User).filter(models.User.username == username).first()
+def _find_user(db: Session, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await db.run_sync(_find_user, username)
+    # Rendre la connexion au pool pendant bcrypt (expire_on_commit=False : user reste lisible)
+    await db.commit()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update(password, user.hashed_password)
+    if not valid:
         return False
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    if new_hash:
+        # Coût bcrypt modifié (BCRYPT_ROUNDS) : re-hachage transparent, enregistré avec last_login
+        user.hashed_password = new_hash
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -94,8 +121,8 @@ def create_refresh_token(data: dict):
     return encoded_jwt
 
 @router.post("/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -105,7 +132,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     
     # Mettre à jour last_login
     user.last_login = datetime.now(timezone.utc)
-    db.commit()
+    await db.commit()
     
     # Créer tokens
     access_token = create_access_token(data={"sub": user.username, "user_id": user.id})
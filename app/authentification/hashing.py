@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from app.core.config import settings
+
+# --- Hachage des mots de passe (bcrypt) ---
+# bcrypt coûte 100-250 ms de CPU par appel : il tourne dans un pool dédié et borné plutôt
+# que dans le pool de threads partagé d'AnyIO, pour qu'une rafale de logins n'affame pas
+# les autres endpoints. Au-delà de PASSWORD_HASH_MAX_QUEUE demandes en attente : 503.
+
+# min_rounds = max_rounds = BCRYPT_ROUNDS : tout hash d'un autre coût est re-haché au login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+class HashingPool:
+    """Exécuteur borné pour bcrypt, avec profondeur de file et temps d'attente."""
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queued = 0
+        self.wait_total = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many concurrent password checks, retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        return self._executor.submit(self._run, time.perf_counter(), fn, *args)
+
+    def _run(self, submitted: float, fn, *args):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.wait_total += time.perf_counter() - submitted
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def run_blocking(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "max_queued": self.max_queued,
+                "wait_avg_ms": round(self.wait_total / started * 1000, 3) if started else 0.0,
+                "rounds": settings.BCRYPT_ROUNDS,
+            }
+
+
+hashing_pool = HashingPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+
+async def verify_and_update(password: str, hashed_password: str):
+    """(mot de passe valide, nouveau hash si le coût a changé, sinon None)."""
+    return await hashing_pool.run(pwd_context.verify_and_update, password, hashed_password)
+
+
+def hash_password(password: str) -> str:
+    # Appelé depuis des handlers synchrones : le thread attend, le CPU reste borné au pool bcrypt
+    return hashing_pool.run_blocking(pwd_context.hash, password)
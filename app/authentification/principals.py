@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import models
+
+# --- Cache des utilisateurs authentifiés ---
+# get_current_user ne relit pas la table users à chaque appel : le principal est gardé
+# PRINCIPAL_CACHE_TTL_SECONDS au plus. Les modifications faites par /users l'invalident
+# tout de suite dans ce processus ; dans les autres workers, le TTL borne le retard
+# (un utilisateur désactivé est refusé au plus tard après ce délai).
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+    role: models.UserRole
+    is_active: bool
+
+
+principal_cache = TTLCache(settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def cached_principal(user_id: int):
+    """Principal en cache, ou MISSING ; sans IO, appelable depuis la boucle d'événements."""
+    return principal_cache.get(user_id)
+
+
+def fetch_principal(db: Session, user_id: int) -> Optional[Principal]:
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is None:
+        return None
+    principal = Principal(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        full_name=user.full_name,
+        role=user.role,
+        is_active=user.is_active,
+    )
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: int):
+    principal_cache.pop(user_id)
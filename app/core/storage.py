@@ -0,0 +1,138 @@
+import hashlib
+import os
+import tempfile
+import re
+import time
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import FileResponse, Response
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+from app.core.config import settings
+
+# --- Stockage des images par contenu ---
+# Chaque fichier est nommé d'après son SHA-256 : une même photo envoyée pour plusieurs
+# produits n'est écrite qu'une fois. Le flux est lu par blocs, haché au fil de l'eau et
+# coupé dès qu'il dépasse MAX_IMAGE_BYTES ; il passe par un fichier temporaire du même
+# répertoire pour que la mise en place (os.replace) soit atomique.
+
+UPLOAD_DIR = settings.UPLOAD_DIR
+CHUNK_SIZE = 64 * 1024
+IMAGE_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+STAGING_PREFIX = ".upload-"
+CONTENT_NAME = re.compile(r"^([0-9a-f]{64})\.(?:%s)$" % "|".join(IMAGE_EXTENSIONS.values()))
+# Enveloppe multipart autour du fichier (boundary, en-têtes de la partie) tolérée dans Content-Length
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+def too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Image larger than {max_bytes} bytes")
+
+
+def stage_upload(source, max_bytes: int):
+    """Copie le flux dans un fichier temporaire ; renvoie (sha256, taille, chemin temporaire)."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=STAGING_PREFIX, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise too_large(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return digest.hexdigest(), size, path
+
+
+class ImageUploadRoute(APIRoute):
+    """Route d'envoi d'image : 413 d'après Content-Length, avant que le corps ne soit lu.
+
+    FastAPI lit le formulaire (et copie le fichier sur disque) avant d'appeler le handler ; la
+    taille annoncée est donc vérifiée en amont. stage_upload reste le garde-fou (corps chunked).
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def limited_handler(request):
+            length = request.headers.get("content-length", "")
+            max_bytes = settings.MAX_IMAGE_BYTES
+            if length.isdigit() and int(length) > max_bytes + MULTIPART_OVERHEAD:
+                raise too_large(max_bytes)
+            return await handler(request)
+
+        return limited_handler
+
+
+def image_filename(sha256: str, extension: str) -> str:
+    return f"{sha256}.{extension}"
+
+
+def content_hash(filename: str):
+    """SHA-256 d'un nom de fichier stocké par contenu, None pour les autres (anciens noms UUID)."""
+    match = CONTENT_NAME.match(filename)
+    return match.group(1) if match else None
+
+
+def store_staged(path: str, filename: str) -> bool:
+    """Met le fichier en place sous son nom de contenu ; False s'il y était déjà (doublon)."""
+    target = os.path.join(UPLOAD_DIR, filename)
+    existed = os.path.exists(target)
+    # Contenu identique par construction : le renommage est sans coût et répare un fichier perdu
+    os.replace(path, target)
+    return not existed
+
+
+def discard_staged(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def remove_image(filename: str):
+    try:
+        os.unlink(os.path.join(UPLOAD_DIR, filename))
+    except FileNotFoundError:
+        pass
+
+
+def stale_staging_files(max_age_seconds: float):
+    """Fichiers temporaires abandonnés (envoi interrompu, processus arrêté)."""
+    if not os.path.isdir(UPLOAD_DIR):
+        return []
+    limit = time.time() - max_age_seconds
+    return [
+        name for name in os.listdir(UPLOAD_DIR)
+        if name.startswith(STAGING_PREFIX) and os.path.getmtime(os.path.join(UPLOAD_DIR, name)) < limit
+    ]
+
+
+# --- Service HTTP de /uploads ---
+# Un fichier nommé d'après son contenu ne change jamais : ETag fort = empreinte, mise en cache
+# d'un an marquée immutable (le navigateur ne revalide même pas). Les anciens noms UUID sont
+# revalidés à chaque usage (no-cache) et obtiennent un 304 tant qu'ils n'ont pas bougé.
+# Les requêtes Range (206) sont gérées par FileResponse.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+class UploadFiles(StaticFiles):
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        sha256 = content_hash(os.path.basename(full_path))
+        headers = {"cache-control": IMMUTABLE_CACHE_CONTROL if sha256 else REVALIDATE_CACHE_CONTROL}
+        if sha256:
+            headers["etag"] = f'"{sha256}"'
+        response = FileResponse(full_path, status_code=status_code, headers=headers, stat_result=stat_result)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,45 @@
+from sqlalchemy import case, func, select, true
+from app.models import models
+
+# --- Agrégats SQL partagés par le dashboard et les rapports ---
+
+PERIODS = ("day", "week", "month")
+
+
+def period_bucket(column, period: str, dialect: str):
+    """Libellé de période calculé par la base : AAAA-MM-JJ (jour, lundi de la semaine) ou AAAA-MM."""
+    if dialect == "postgresql":
+        return func.to_char(func.date_trunc(period, column), "YYYY-MM" if period == "month" else "YYYY-MM-DD")
+    if period == "day":
+        return func.strftime("%Y-%m-%d", column)
+    if period == "week":
+        # Dimanche suivant (ou le jour même) moins 6 jours = lundi de la semaine ISO
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m", column)
+
+
+def sum_if(condition, value):
+    return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
+
+
+def inventory_stats_query():
+    """Statistiques globales du stock en une seule requête (un agrégat par table)."""
+    Product, Movement = models.Product, models.StockMovement
+    IN, OUT = models.MovementType.IN, models.MovementType.OUT
+    products = select(
+        func.count(Product.id).label("total_products"),
+        func.coalesce(func.sum(Product.quantity), 0).label("total_stock"),
+        func.coalesce(func.sum(Product.price * Product.quantity), 0.0).label("total_stock_value"),
+        sum_if(Product.quantity < Product.min_stock, 1).label("low_stock_count"),
+    ).subquery("p")
+    movements = select(
+        sum_if(Movement.type == IN, 1).label("total_entries"),
+        sum_if(Movement.type == OUT, 1).label("total_exits"),
+        sum_if(Movement.type == IN, Movement.quantity).label("entry_quantity"),
+        sum_if(Movement.type == OUT, Movement.quantity).label("exit_quantity"),
+    ).subquery("m")
+    return select(products, movements).select_from(products.join(movements, true()))
+
+
+def inventory_stats(db) -> dict:
+    return dict(db.execute(inventory_stats_query()).one()._mapping)
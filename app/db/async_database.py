@@ -0,0 +1,43 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.db.database import DATABASE_URL
+from app.db.pool_metrics import TimedAsyncQueuePool, engine_options, instrument_pool
+import os
+
+# --- Accès asynchrone à la base (handlers async def) ---
+# Même base que SessionLocal, avec un driver asynchrone : aiosqlite en local / tests, asyncpg en production.
+# ASYNC_DATABASE_URL permet de forcer une autre URL.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+_async_engine = None
+
+
+def get_async_engine():
+    """Engine async créé au premier usage : importer l'application ne charge pas asyncpg / aiosqlite."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, TimedAsyncQueuePool)
+        )
+        instrument_pool(_async_engine)
+    return _async_engine
+
+
+# expire_on_commit=False : les objets restent lisibles après commit sans recharger (pas d'IO implicite)
+# Sans bind : l'engine est passé à l'ouverture de la session (AsyncSessionLocal(bind=get_async_engine()))
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
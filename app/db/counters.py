@@ -0,0 +1,191 @@
+import enum
+import sys
+
+from sqlalchemy import event, insert, inspect, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.db.aggregates import inventory_stats, inventory_stats_query
+from app.models import models
+
+# --- Compteurs globaux du stock (table inventory_counters, une seule ligne) ---
+# Ajustés par deltas dans la transaction de chaque écriture :
+#  - automatiquement au flush pour les produits et mouvements écrits via l'ORM
+#  - explicitement (adjust_counters) pour les UPDATE / INSERT en masse
+# Les statistiques du dashboard deviennent une lecture d'une ligne.
+# La ligne est créée avec la table (migration 0002, create_all) : jamais de delta perdu
+# faute de ligne à mettre à jour.
+
+COUNTERS_ID = 1
+COUNTER_COLUMNS = (
+    "total_products", "total_stock", "total_stock_value", "low_stock_count",
+    "total_entries", "total_exits", "entry_quantity", "exit_quantity",
+)
+# Écart toléré sur la valeur du stock (cumul de flottants)
+VALUE_TOLERANCE = 0.01
+
+
+def product_contribution(quantity, price, min_stock) -> dict:
+    """Part d'un produit dans les compteurs."""
+    quantity = quantity or 0
+    return {
+        "total_products": 1,
+        "total_stock": quantity,
+        "total_stock_value": (price or 0) * quantity,
+        "low_stock_count": int(quantity < (min_stock or 0)),
+    }
+
+
+def movement_contribution(type, quantity) -> dict:
+    """Part d'un mouvement dans les compteurs."""
+    value = type.value if isinstance(type, enum.Enum) else str(type).upper()
+    if value == models.MovementType.IN.value:
+        return {"total_entries": 1, "entry_quantity": quantity}
+    return {"total_exits": 1, "exit_quantity": quantity}
+
+
+def stock_change_delta(price, min_stock, old_quantity, new_quantity) -> dict:
+    """Delta d'une variation de stock d'un produit existant."""
+    return subtract(
+        product_contribution(new_quantity, price, min_stock),
+        product_contribution(old_quantity, price, min_stock),
+    )
+
+
+def add(*parts: dict) -> dict:
+    total = {}
+    for part in parts:
+        for column, value in part.items():
+            total[column] = total.get(column, 0) + value
+    return total
+
+
+def subtract(new: dict, old: dict) -> dict:
+    return add(new, {column: -value for column, value in old.items()})
+
+
+def adjust_counters(connection, delta: dict):
+    """UPDATE atomique col = col + delta."""
+    values = {column: getattr(models.InventoryCounters, column) + value
+              for column, value in delta.items() if value}
+    if values:
+        connection.execute(
+            update(models.InventoryCounters.__table__)
+            .where(models.InventoryCounters.id == COUNTERS_ID)
+            .values(**values)
+        )
+
+
+# Conserve l'ancienne valeur même si l'attribut était expiré (sinon le delta serait inconnu)
+for _attribute in (models.Product.quantity, models.Product.price, models.Product.min_stock):
+    event.listen(_attribute, "set", lambda target, value, oldvalue, initiator: value,
+                 active_history=True, retval=True)
+
+
+def _previous(obj, attribute):
+    # Valeur avant le flush (l'historique est encore disponible dans after_flush)
+    history = inspect(obj).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attribute)
+
+
+def _product_state(obj, previous=False):
+    get = (lambda attr: _previous(obj, attr)) if previous else (lambda attr: getattr(obj, attr))
+    return product_contribution(get("quantity"), get("price"), get("min_stock"))
+
+
+@event.listens_for(Session, "after_flush")
+def _counters_after_flush(session, flush_context):
+    parts = []
+    for obj in session.new:
+        if isinstance(obj, models.Product):
+            parts.append(_product_state(obj))
+        elif isinstance(obj, models.StockMovement):
+            parts.append(movement_contribution(obj.type, obj.quantity))
+    for obj in session.deleted:
+        if isinstance(obj, models.Product):
+            parts.append(subtract({}, _product_state(obj, previous=True)))
+        elif isinstance(obj, models.StockMovement):
+            parts.append(subtract({}, movement_contribution(_previous(obj, "type"), _previous(obj, "quantity"))))
+    for obj in session.dirty:
+        if isinstance(obj, models.Product) and session.is_modified(obj, include_collections=False):
+            parts.append(subtract(_product_state(obj), _product_state(obj, previous=True)))
+    if parts:
+        adjust_counters(session.connection(), add(*parts))
+
+
+def seed_counters(connection):
+    """Crée la ligne des compteurs depuis products et stock_movements si elle manque."""
+    table = models.InventoryCounters.__table__
+    if connection.execute(select(table.c.id).where(table.c.id == COUNTERS_ID)).first() is not None:
+        return
+    stats = inventory_stats_query().subquery()
+    connection.execute(insert(table).from_select(
+        ["id", *COUNTER_COLUMNS],
+        select(literal(COUNTERS_ID), *[stats.c[column] for column in COUNTER_COLUMNS]),
+    ))
+
+
+@event.listens_for(models.Base.metadata, "after_create")
+def _seed_after_create(target, connection, **kw):
+    # Après toutes les tables : l'INSERT ... SELECT lit products et stock_movements
+    if models.InventoryCounters.__table__ in kw.get("tables", ()):
+        seed_counters(connection)
+
+
+def rebuild_counters(db: Session) -> dict:
+    """Recalcule les compteurs depuis products et stock_movements (réparation)."""
+    stats = inventory_stats(db)
+    counters = db.get(models.InventoryCounters, COUNTERS_ID)
+    if counters is None:
+        counters = models.InventoryCounters(id=COUNTERS_ID)
+        db.add(counters)
+    for column in COUNTER_COLUMNS:
+        setattr(counters, column, stats[column])
+    db.commit()
+    return stats
+
+
+def read_counters(db: Session) -> dict:
+    """Lecture O(1) des compteurs."""
+    table = models.InventoryCounters.__table__
+    row = db.execute(select(table).where(table.c.id == COUNTERS_ID)).first()
+    if row is None:
+        # Base créée hors migrations et create_all : recalcul sans écrire (voir rebuild)
+        return inventory_stats(db)
+    return {column: row._mapping[column] for column in COUNTER_COLUMNS}
+
+
+def verify_counters(db: Session) -> dict:
+    """Compare les compteurs au recalcul complet ; renvoie les écarts {colonne: (compteur, réel)}."""
+    expected = inventory_stats(db)
+    current = read_counters(db)
+    drift = {}
+    for column in COUNTER_COLUMNS:
+        tolerance = VALUE_TOLERANCE if column == "total_stock_value" else 0
+        if abs((current[column] or 0) - (expected[column] or 0)) > tolerance:
+            drift[column] = (current[column], expected[column])
+    return drift
+
+
+if __name__ == "__main__":
+    # python -m app.db.counters verify|rebuild
+    from app.db.database import SessionLocal, engine
+
+    if sys.argv[1:] not in (["verify"], ["rebuild"]):
+        sys.exit("usage: python -m app.db.counters verify|rebuild")
+    models.Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        if sys.argv[1] == "rebuild":
+            rebuild_counters(session)
+            print("Compteurs reconstruits")
+        else:
+            drift = verify_counters(session)
+            for column, (current, expected) in drift.items():
+                print(f"{column}: compteur={current} réel={expected}")
+            if drift:
+                sys.exit(1)
+            print("Compteurs cohérents")
+    finally:
+        session.close()
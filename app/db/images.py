@@ -0,0 +1,99 @@
+import os
+import sys
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core import storage
+from app.models import models
+
+# --- Comptage des références aux images stockées ---
+# stored_images.ref_count = nombre de produits qui pointent sur l'image (products.image_hash).
+# Les ajustements sont des UPDATE atomiques (ref_count = ref_count ± 1) dans la transaction
+# de l'écriture du produit ; une image retombée à 0 est supprimée dans une transaction suivante.
+
+STAGING_MAX_AGE_SECONDS = 3600
+
+images = models.StoredImage.__table__
+
+
+def image_extension(db: Session, sha256: str):
+    return db.execute(select(images.c.extension).where(images.c.sha256 == sha256)).scalar()
+
+
+def acquire_image(db: Session, sha256: str, extension: str, content_type: str, size: int) -> str:
+    """Ajoute une référence, en créant la ligne au premier envoi de ce contenu.
+
+    Renvoie l'extension sous laquelle le contenu est stocké (celle du premier envoi).
+    """
+    result = db.execute(
+        update(images).where(images.c.sha256 == sha256).values(ref_count=images.c.ref_count + 1)
+    )
+    if result.rowcount:
+        return image_extension(db, sha256)
+    try:
+        with db.begin_nested():
+            db.execute(insert(images).values(
+                sha256=sha256, extension=extension, content_type=content_type, size=size, ref_count=1,
+            ))
+    except IntegrityError:
+        # Même contenu inséré par une requête concurrente entre-temps
+        db.execute(
+            update(images).where(images.c.sha256 == sha256).values(ref_count=images.c.ref_count + 1)
+        )
+        return image_extension(db, sha256)
+    return extension
+
+
+def release_image(db: Session, sha256: str):
+    db.execute(update(images).where(images.c.sha256 == sha256).values(ref_count=images.c.ref_count - 1))
+
+
+def collect_image(db: Session, sha256: str) -> bool:
+    """Supprime l'image si plus aucun produit ne la référence (à appeler après le commit)."""
+    extension = image_extension(db, sha256)
+    if extension is None:
+        return False
+    # Condition sur ref_count : une référence ajoutée entre-temps garde l'image
+    deleted = db.execute(delete(images).where(images.c.sha256 == sha256, images.c.ref_count <= 0)).rowcount
+    if deleted:
+        # Fichier supprimé avant le commit, sous le verrou pris par le DELETE : un envoi concurrent
+        # du même contenu attend ce commit pour recréer la ligne, puis remet le fichier en place
+        try:
+            storage.remove_image(storage.image_filename(sha256, extension))
+        except OSError:
+            db.rollback()
+            raise
+    db.commit()
+    return bool(deleted)
+
+
+def collect_orphans(db: Session) -> int:
+    """Ramasse les images sans référence, les fichiers sans ligne et les envois abandonnés."""
+    orphans = db.execute(select(images.c.sha256).where(images.c.ref_count <= 0)).scalars().all()
+    removed = sum(collect_image(db, sha256) for sha256 in orphans)
+    known = {
+        storage.image_filename(sha256, extension)
+        for sha256, extension in db.execute(select(images.c.sha256, images.c.extension))
+    }
+    if os.path.isdir(storage.UPLOAD_DIR):
+        for name in os.listdir(storage.UPLOAD_DIR):
+            if storage.content_hash(name) and name not in known:
+                storage.remove_image(name)
+                removed += 1
+    for name in storage.stale_staging_files(STAGING_MAX_AGE_SECONDS):
+        storage.remove_image(name)
+        removed += 1
+    return removed
+
+
+if __name__ == "__main__":
+    # python -m app.db.images gc
+    from app.db.database import SessionLocal
+
+    if sys.argv[1:] != ["gc"]:
+        sys.exit("usage: python -m app.db.images gc")
+    session = SessionLocal()
+    try:
+        print(f"{collect_orphans(session)} fichier(s) supprimé(s)")
+    finally:
+        session.close()
@@ -5,6 +5,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.db.database import engine, SessionLocal
+from app.db.search import ensure_search_index
 from app.models import models
 import hashlib  # Alternative si bcrypt ne marche pas
 
@@ -20,6 +21,7 @@ def init_db():
         
         # Créer toutes les tables
         models.Base.metadata.create_all(bind=engine)
+        ensure_search_index(engine)
         
         db = SessionLocal()
         
@@ -31,8 +33,7 @@ def init_db():
                 
                 # Essayer bcrypt d'abord, sinon utiliser SHA256
                 try:
-                    from passlib.context import CryptContext
-                    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+                    from app.authentification.hashing import pwd_context
                     hashed_password = pwd_context.hash("admin123")
                     print("✓ Using bcrypt for password hashing")
                 except Exception as e:
@@ -76,8 +77,7 @@ def init_db():
                 print("Creating test manager user...")
                 
                 try:
-                    from passlib.context import CryptContext
-                    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+                    from app.authentification.hashing import pwd_context
                     hashed_password = pwd_context.hash("manager123")
                 except:
                     hashed_password = get_password_hash_simple("manager123")
@@ -98,8 +98,7 @@ def init_db():
                 print("Creating test viewer user...")
                 
                 try:
-                    from passlib.context import CryptContext
-                    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+                    from app.authentification.hashing import pwd_context
                     hashed_password = pwd_context.hash("viewer123")
                 except:
                     hashed_password = get_password_hash_simple("viewer123")
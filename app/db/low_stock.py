@@ -0,0 +1,33 @@
+from typing import Optional
+
+from sqlalchemy.orm import selectinload
+
+from app.db.pagination import paginate
+from app.models import models
+
+# --- Recherche des produits en stock bas, commune à tous les endpoints d'alerte ---
+# Sans seuil explicite : quantity < min_stock, servi par les index partiels ix_products_low_stock
+# et ix_products_low_stock_category (SQLite et PostgreSQL), qui ne contiennent que les quelques
+# produits concernés, déjà triés par id pour la pagination.
+# Avec un seuil : quantity < seuil, servi par ix_products_quantity.
+
+LOW_STOCK_KEYS = [models.Product.id]
+
+
+def low_stock_filter(query, threshold: Optional[int] = None, category_id: Optional[int] = None):
+    """Restreint une requête sur Product aux produits en stock bas (et à une catégorie)."""
+    Product = models.Product
+    if threshold is not None:
+        query = query.filter(Product.quantity < threshold)
+    else:
+        # Condition identique à celle de l'index partiel, sinon il n'est pas utilisé
+        query = query.filter(Product.quantity < Product.min_stock)
+    if category_id is not None:
+        query = query.filter(Product.category_id == category_id)
+    return query
+
+
+def list_low_stock(db, response, threshold: Optional[int], category_id: Optional[int], limit: int, cursor: Optional[str]):
+    """Page de produits en stock bas avec leur catégorie (exécutée via run_sync par les handlers async)."""
+    query = db.query(models.Product).options(selectinload(models.Product.category))
+    return paginate(low_stock_filter(query, threshold, category_id), LOW_STOCK_KEYS, cursor, limit, response)
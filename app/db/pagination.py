@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import literal, tuple_
+
+# Pagination par curseur (keyset) : le coût d'une page ne dépend pas de sa profondeur
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor shape")
+        return [_coerce(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _coerce(value: Any, column) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+
+def apply_keyset(query, columns: Sequence, cursor: Optional[str], limit: int, descending: bool = False):
+    """Filtre après le curseur, trie sur les colonnes clés et lit une ligne de plus que la page."""
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        bound = tuple_(*[literal(v, c.type) for v, c in zip(values, columns)])
+        query = query.filter(key < bound if descending else key > bound)
+    ordering = [c.desc() if descending else c.asc() for c in columns]
+    return query.order_by(*ordering).limit(limit + 1)
+
+
+def split_page(rows: Sequence, columns: Sequence, limit: int) -> Tuple[list, Optional[str]]:
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor([getattr(last, c.key) for c in columns])
+
+
+def paginate(query, columns: Sequence, cursor: Optional[str], limit: int, response, descending: bool = False) -> list:
+    """Exécute une page keyset et expose le curseur suivant dans l'en-tête X-Next-Cursor."""
+    rows = apply_keyset(query, columns, cursor, limit, descending).all()
+    items, next_cursor = split_page(rows, columns, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
@@ -0,0 +1,123 @@
+import enum
+import sys
+from collections import defaultdict
+
+from sqlalchemy import delete, event, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.aggregates import sum_if
+from app.models import models
+
+# --- Agrégat movement_daily_rollup : (jour, produit) -> entrées, sorties, nombres ---
+# Mis à jour dans la transaction de chaque écriture de mouvement :
+#  - automatiquement au flush pour les mouvements ajoutés/supprimés via l'ORM
+#  - explicitement (record_movements) pour les insertions en masse
+# Les mouvements sans produit (produit supprimé : product_id NULL) sont comptés sous
+# DETACHED_PRODUCT_ID : l'historique et les totaux ne changent pas à la suppression d'un produit.
+
+DETACHED_PRODUCT_ID = 0
+COUNT_COLUMNS = ("entries", "exits", "entry_count", "exit_count")
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _type_value(value) -> str:
+    return value.value if isinstance(value, enum.Enum) else str(value).upper()
+
+
+def record_movements(connection, movements, sign: int = 1):
+    """Ajoute (ou retire avec sign=-1) des mouvements (timestamp, product_id, type, quantity) à l'agrégat."""
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    for timestamp, product_id, type, quantity in movements:
+        if product_id is None:
+            product_id = DETACHED_PRODUCT_ID
+        row = totals[(timestamp.date(), product_id)]
+        if _type_value(type) == models.MovementType.IN.value:
+            row[0] += sign * quantity
+            row[2] += sign
+        else:
+            row[1] += sign * quantity
+            row[3] += sign
+    if not totals:
+        return
+
+    table = models.MovementDailyRollup.__table__
+    rows = [
+        {"day": day, "product_id": product_id, "entries": e, "exits": x, "entry_count": ec, "exit_count": xc}
+        for (day, product_id), (e, x, ec, xc) in totals.items()
+    ]
+    connection.execute(_accumulate(_INSERTS[connection.dialect.name](table).values(rows)))
+
+
+def _accumulate(stmt):
+    # INSERT ... ON CONFLICT (day, product_id) : les compteurs s'ajoutent à la ligne existante
+    table = models.MovementDailyRollup.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.product_id],
+        set_={column: table.c[column] + stmt.excluded[column] for column in COUNT_COLUMNS},
+    )
+
+
+def detach_products(connection, product_ids):
+    """Reporte les lignes des produits supprimés sous DETACHED_PRODUCT_ID (leurs mouvements restent)."""
+    table = models.MovementDailyRollup.__table__
+    source = select(
+        table.c.day, literal(DETACHED_PRODUCT_ID), *[table.c[column] for column in COUNT_COLUMNS]
+    ).where(table.c.product_id.in_(product_ids))
+    stmt = _INSERTS[connection.dialect.name](table).from_select(["day", "product_id", *COUNT_COLUMNS], source)
+    connection.execute(_accumulate(stmt))
+    connection.execute(delete(table).where(table.c.product_id.in_(product_ids)))
+
+
+@event.listens_for(Session, "after_flush")
+def _rollup_after_flush(session, flush_context):
+    def as_tuple(m):
+        return m.timestamp, m.product_id, m.type, m.quantity
+
+    added = [as_tuple(o) for o in session.new if isinstance(o, models.StockMovement)]
+    removed = [as_tuple(o) for o in session.deleted if isinstance(o, models.StockMovement)]
+    if added or removed:
+        connection = session.connection()
+        record_movements(connection, added)
+        record_movements(connection, removed, sign=-1)
+    # Produits supprimés : leurs mouvements passent à product_id NULL, l'agrégat suit
+    deleted_products = [o.id for o in session.deleted if isinstance(o, models.Product)]
+    if deleted_products:
+        detach_products(session.connection(), deleted_products)
+
+
+def rebuild_rollup(db: Session):
+    """Recalcule entièrement l'agrégat depuis stock_movements (rattrapage, réparation)."""
+    movement = models.StockMovement
+    day = func.date(movement.timestamp)
+    is_in = movement.type == models.MovementType.IN
+    is_out = movement.type == models.MovementType.OUT
+    product_id = func.coalesce(movement.product_id, DETACHED_PRODUCT_ID)
+    source = select(
+        day, product_id,
+        sum_if(is_in, movement.quantity), sum_if(is_out, movement.quantity),
+        sum_if(is_in, 1), sum_if(is_out, 1),
+    ).group_by(day, product_id)
+
+    table = models.MovementDailyRollup.__table__
+    db.execute(delete(table))
+    db.execute(table.insert().from_select(
+        ["day", "product_id", "entries", "exits", "entry_count", "exit_count"], source
+    ))
+    db.commit()
+
+
+if __name__ == "__main__":
+    # python -m app.db.rollup rebuild
+    from app.db.database import SessionLocal, engine
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m app.db.rollup rebuild")
+    models.Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        rebuild_rollup(session)
+        print(f"{session.query(models.MovementDailyRollup).count()} lignes d'agrégat reconstruites")
+    finally:
+        session.close()
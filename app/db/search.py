@@ -0,0 +1,127 @@
+import re
+from typing import Optional
+
+from sqlalchemy import DDL, Float, Integer, and_, column, event, false, func, literal, or_, text
+from app.db.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.models import models
+
+# --- Index de recherche plein texte sur products(name, description) ---
+# SQLite : table virtuelle FTS5 synchronisée par triggers
+# PostgreSQL : index GIN trigramme (pg_trgm), utilisé directement par ILIKE '%terme%'
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, content='products', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+]
+
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_products_description_trgm ON products USING gin (description gin_trgm_ops)",
+]
+
+SEARCH_DDL = {"sqlite": SQLITE_SEARCH_DDL, "postgresql": POSTGRES_SEARCH_DDL}
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(models.Product.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in POSTGRES_SEARCH_DDL:
+    event.listen(models.Product.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+event.listen(
+    models.Product.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"),
+)
+
+
+# Clé du curseur de recherche : (score de pertinence, id)
+SEARCH_CURSOR_COLUMNS = [column("score", Float), models.Product.id]
+
+
+def ensure_search_index(engine):
+    """Crée l'index sur une base existante (create_all ne rejoue pas after_create) et le reconstruit."""
+    statements = SEARCH_DDL.get(engine.dialect.name, [])
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+
+def _fts_match_expression(term: str) -> str:
+    # Chaque mot devient un préfixe : "coll arg" -> "coll"* "arg"*
+    tokens = re.findall(r"\w+", term)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_products(query, term: str, dialect: str, limit: int, offset: int = 0, after=None):
+    """Filtre, classe par pertinence et limite une requête sur Product.
+
+    Les lignes sont des couples (Product, score) ; `after` = (score, id) du dernier résultat
+    déjà servi (pagination keyset sur la clé de classement).
+    """
+    Product = models.Product
+    if dialect == "sqlite":
+        match = _fts_match_expression(term)
+        if not match:
+            return query.add_columns(literal(0.0, Float).label("score")).filter(false())
+        # bm25 : plus petit = plus pertinent, le nom pèse plus que la description.
+        # Le tri et la limite restent dans FTS5 pour ne joindre que la page demandée.
+        # (« score » et non « rank » : rank est une colonne cachée de FTS5)
+        keyset = "WHERE (score, id) > (:after_score, :after_id) " if after else ""
+        fts = (
+            text(
+                "SELECT id, score FROM ("
+                "SELECT rowid AS id, bm25(products_fts, 10.0, 1.0) AS score "
+                "FROM products_fts WHERE products_fts MATCH :match) "
+                f"{keyset}ORDER BY score, id LIMIT :limit OFFSET :offset"
+            )
+            .bindparams(match=match, limit=limit, offset=offset)
+            .columns(id=Integer, score=Float)
+        )
+        if after:
+            fts = fts.bindparams(after_score=after[0], after_id=after[1])
+        fts = fts.subquery("fts")
+        return (
+            query.add_columns(fts.c.score)
+            .join(fts, fts.c.id == Product.id)
+            .order_by(fts.c.score, Product.id)
+        )
+
+    pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    query = query.filter(or_(
+        Product.name.ilike(pattern, escape="\\"),
+        Product.description.ilike(pattern, escape="\\"),
+    ))
+    if dialect == "postgresql":
+        score = func.greatest(
+            func.similarity(Product.name, term),
+            func.similarity(func.coalesce(Product.description, ""), term),
+        )
+        if after:
+            # Score décroissant puis id croissant
+            query = query.filter(or_(score < after[0], and_(score == after[0], Product.id > after[1])))
+        query = query.add_columns(score.label("score")).order_by(score.desc(), Product.id)
+    else:
+        if after:
+            query = query.filter(Product.id > after[1])
+        query = query.add_columns(literal(0.0, Float).label("score")).order_by(Product.id)
+    return query.offset(offset).limit(limit)
+
+
+def search_page(query, term: str, dialect: str, cursor: Optional[str], limit: int, response) -> list:
+    """Une page de résultats classés, curseur (score, id) suivant dans X-Next-Cursor."""
+    after = decode_cursor(cursor, SEARCH_CURSOR_COLUMNS) if cursor else None
+    rows = search_products(query, term, dialect, limit + 1, after=after).all()
+    if len(rows) > limit:
+        product, score = rows[limit - 1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([score, product.id])
+    return [product for product, _ in rows[:limit]]
@@ -0,0 +1,153 @@
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+# --- Instrumentation SQL ---
+# Chaque requête exécutée (tous engines, sync et async) est chronométrée entre
+# before_cursor_execute et after_cursor_execute :
+#  - totaux de la requête HTTP en cours (ContextVar), renvoyés dans l'en-tête Server-Timing ;
+#  - agrégat par requête SQL normalisée depuis le démarrage (/internal/sql-stats) ;
+#  - journal des requêtes lentes (logger app.sql.slow) au-delà de SLOW_QUERY_MS.
+
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+OTHER_STATEMENTS = "<other>"
+
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|\$\d+"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+"), "(?), ..."),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize_sql(statement: str) -> str:
+    """Remplace littéraux et paramètres par ?, regroupe les listes IN / VALUES."""
+    for pattern, replacement in _NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+class RequestSqlStats:
+    """Requêtes SQL d'une requête HTTP."""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.duration = 0.0
+
+    @property
+    def route(self) -> Optional[str]:
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path")
+
+
+_current: ContextVar[Optional[RequestSqlStats]] = ContextVar("request_sql_stats", default=None)
+
+
+class StatementStats:
+    """Agrégat par requête normalisée, partagé entre threads."""
+
+    def __init__(self, max_statements: int):
+        self.max_statements = max_statements
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float):
+        with self._lock:
+            if statement not in self._data and len(self._data) >= self.max_statements:
+                statement = OTHER_STATEMENTS
+            entry = self._data.get(statement)
+            if entry is None:
+                entry = self._data[statement] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+
+    def top(self, limit: int) -> list:
+        with self._lock:
+            items = sorted(self._data.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {
+                "statement": statement,
+                "calls": calls,
+                "total_ms": round(total * 1000, 3),
+                "avg_ms": round(total / calls * 1000, 3),
+                "max_ms": round(longest * 1000, 3),
+            }
+            for statement, (calls, total, longest) in items
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+statement_stats = StatementStats(settings.SQL_STATS_MAX_STATEMENTS)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_stats_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_sql_stats_start", None)
+    if start is None:
+        return
+    duration = time.perf_counter() - start
+    normalized = normalize_sql(statement)
+    statement_stats.record(normalized, duration)
+    current = _current.get()
+    if current is not None:
+        current.count += 1
+        current.duration += duration
+    if duration * 1000 >= settings.SLOW_QUERY_MS:
+        slow_query_logger.warning(
+            "slow query %.1f ms route=%s sql=%s",
+            duration * 1000,
+            current.route if current is not None else None,
+            normalized,
+        )
+
+
+def server_timing(stats: RequestSqlStats) -> str:
+    return f'sql;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+
+
+class SqlTimingMiddleware:
+    """Middleware ASGI : compte les requêtes SQL de chaque requête HTTP et ajoute Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestSqlStats(scope)
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                # Les requêtes émises pendant le streaming du corps arrivent trop tard pour l'en-tête
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
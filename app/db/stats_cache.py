@@ -0,0 +1,83 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.db.counters import read_counters
+from app.models import models
+
+# --- Cache des agrégats du dashboard et des rapports ---
+# Les clés incluent un numéro de version des données, incrémenté au commit de toute
+# session ayant écrit dans les tables concernées : une écriture invalide tout le cache.
+
+WATCHED_TABLES = {
+    models.Product.__tablename__,
+    models.StockMovement.__tablename__,
+    models.ProductCategory.__tablename__,
+    models.InventoryCounters.__tablename__,
+}
+WATCHED_CLASSES = (models.Product, models.StockMovement, models.ProductCategory, models.InventoryCounters)
+
+stats_cache = TTLCache(settings.STATS_CACHE_MAX_ENTRIES, settings.STATS_CACHE_TTL_SECONDS)
+
+_version = 0
+_version_lock = threading.Lock()
+
+
+def data_version() -> int:
+    return _version
+
+
+def bump_version():
+    global _version
+    with _version_lock:
+        _version += 1
+
+
+def cached(key: tuple, compute):
+    """Renvoie la valeur en cache pour la version courante, sinon la calcule et la mémorise."""
+    versioned_key = (data_version(),) + key
+    value = stats_cache.get(versioned_key)
+    if value is MISSING:
+        value = compute()
+        stats_cache.set(versioned_key, value)
+    return value
+
+
+def cached_inventory_stats(db) -> dict:
+    """Agrégat commun aux endpoints de statistiques, calculé une fois par version des données."""
+    return cached(("inventory.stats",), lambda: read_counters(db))
+
+
+def cache_stats() -> dict:
+    return {"version": data_version(), **stats_cache.stats()}
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_after_flush(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, WATCHED_CLASSES):
+            session.info["stats_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_statements(orm_execute_state):
+    # UPDATE / INSERT / DELETE exécutés hors unité de travail (mises à jour atomiques, lots)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if getattr(table, "name", None) in WATCHED_TABLES:
+            orm_execute_state.session.info["stats_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session):
+    if session.info.pop("stats_dirty", False):
+        bump_version()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_after_rollback(session):
+    session.info.pop("stats_dirty", None)
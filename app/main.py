@@ -1,3 +1,4 @@
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import (
@@ -9,9 +10,13 @@ from app.routers import (
     reports,   # Nouveau
     categories, # Nouveau
     settings,  # À créer
-    notifications  # À créer
+    notifications,  # À créer
+    internal
 )
 from app.authentification import auth
+from app.db.sql_stats import SqlTimingMiddleware
+from app.core.config import settings as app_settings
+from app.core.storage import UploadFiles
 
 app = FastAPI(title=" Stock Manager API")
 
@@ -22,8 +27,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Nombre et durée des requêtes SQL de chaque appel (en-tête Server-Timing)
+app.add_middleware(SqlTimingMiddleware)
+
 # Inclure les routes
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -32,6 +41,11 @@ app.include_router(movements.router)
 app.include_router(dashboard.router)
 app.include_router(reports.router)
 app.include_router(categories.router)
+app.include_router(internal.router)
+
+# Images des produits (image_url = /uploads/<fichier>) : ETag, 304, Range, cache long
+os.makedirs(app_settings.UPLOAD_DIR, exist_ok=True)
+app.mount("/uploads", UploadFiles(directory=app_settings.UPLOAD_DIR), name="uploads")
 
 @app.get("/")
 def health_check():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Enum, Boolean, CheckConstraint, Index, text
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
 import enum
@@ -28,6 +28,18 @@ class ProductCategory(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Filet de sécurité : le stock ne peut jamais devenir négatif
+        CheckConstraint("quantity >= 0", name="ck_products_quantity_non_negative"),
+        # Filtres par catégorie et alertes de stock
+        Index("ix_products_category_id", "category_id"),
+        Index("ix_products_quantity", "quantity"),
+        # Index partiels : seulement les produits sous leur seuil d'alerte (voir app/db/low_stock.py)
+        Index("ix_products_low_stock", "id",
+              sqlite_where=text("quantity < min_stock"), postgresql_where=text("quantity < min_stock")),
+        Index("ix_products_low_stock_category", "category_id", "id",
+              sqlite_where=text("quantity < min_stock"), postgresql_where=text("quantity < min_stock")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -39,6 +51,9 @@ class Product(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     image_url = Column(String(255), nullable=True)
+    # Image stockée par contenu (voir StoredImage) ; NULL pour les anciennes images
+    image_hash = Column(String(64), ForeignKey("stored_images.sha256", name="fk_products_image_hash"),
+                        nullable=True, index=True)
 
     # Relations
     category = relationship("ProductCategory", back_populates="products")
@@ -46,19 +61,65 @@ class Product(Base):
 
 class StockMovement(Base):
     __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Historique d'un produit et statistiques par type, triés / bornés par date
+        Index("ix_stock_movements_product_id_timestamp", "product_id", "timestamp"),
+        Index("ix_stock_movements_type_timestamp", "type", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     type = Column(Enum(MovementType), nullable=False)
     quantity = Column(Integer, nullable=False)
     reason = Column(String(255), nullable=True)  # Raison du mouvement
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Qui a fait le mouvement
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)  # Qui a fait le mouvement
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
 
     # Relations
     product = relationship("Product", back_populates="movements")
     user = relationship("User", back_populates="movements")
 
+# --- Agrégat journalier des mouvements, tenu à jour à chaque écriture ---
+class MovementDailyRollup(Base):
+    __tablename__ = "movement_daily_rollup"
+    __table_args__ = (
+        Index("ix_movement_daily_rollup_product_day", "product_id", "day"),
+    )
+
+    day = Column(Date, primary_key=True)
+    # Sans clé étrangère : 0 regroupe les mouvements des produits supprimés (product_id NULL),
+    # qui restent dans l'historique et les totaux
+    product_id = Column(Integer, primary_key=True)
+    entries = Column(Integer, nullable=False, default=0)
+    exits = Column(Integer, nullable=False, default=0)
+    entry_count = Column(Integer, nullable=False, default=0)
+    exit_count = Column(Integer, nullable=False, default=0)
+
+# --- Compteurs globaux du stock (une seule ligne), ajustés à chaque écriture ---
+class InventoryCounters(Base):
+    __tablename__ = "inventory_counters"
+
+    id = Column(Integer, primary_key=True)
+    total_products = Column(Integer, nullable=False, default=0)
+    total_stock = Column(Integer, nullable=False, default=0)
+    total_stock_value = Column(Float, nullable=False, default=0.0)
+    low_stock_count = Column(Integer, nullable=False, default=0)
+    total_entries = Column(Integer, nullable=False, default=0)
+    total_exits = Column(Integer, nullable=False, default=0)
+    entry_quantity = Column(Integer, nullable=False, default=0)
+    exit_quantity = Column(Integer, nullable=False, default=0)
+
+# --- Images des produits, stockées une fois par contenu (SHA-256) ---
+class StoredImage(Base):
+    __tablename__ = "stored_images"
+
+    sha256 = Column(String(64), primary_key=True)
+    extension = Column(String(10), nullable=False)
+    content_type = Column(String(50), nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # Produits qui l'utilisent
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 # --- NOUVEAU : Utilisateurs (admins) ---
 class User(Base):
     __tablename__ = "users"
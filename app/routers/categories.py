@@ -3,22 +3,16 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.models import models
 from app.schemas import schemas
-from app.db.database import SessionLocal
-from app.authentification.auth import get_current_user
+from app.db.database import get_db
+from app.authentification.auth import get_current_user_sync
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 @router.get("/", response_model=List[schemas.ProductCategory])
 def get_categories(
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: schemas.User = Depends(get_current_user_sync)
 ):
     categories = db.query(models.ProductCategory).all()
     return categories
@@ -27,7 +21,7 @@ def get_categories(
 def create_category(
     category: schemas.ProductCategoryCreate,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: schemas.User = Depends(get_current_user_sync)
 ):
     # Vérifier si la catégorie existe déjà
     existing = db.query(models.ProductCategory).filter(
@@ -47,7 +41,7 @@ def create_category(
 def get_category(
     category_id: int,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: schemas.User = Depends(get_current_user_sync)
 ):
     category = db.query(models.ProductCategory).filter(
         models.ProductCategory.id == category_id
@@ -63,7 +57,7 @@ def update_category(
     category_id: int,
     category_update: schemas.ProductCategoryCreate,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: schemas.User = Depends(get_current_user_sync)
 ):
     category = db.query(models.ProductCategory).filter(
         models.ProductCategory.id == category_id
@@ -91,7 +85,7 @@ def update_category(
 def delete_category(
     category_id: int,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
+    current_user: schemas.User = Depends(get_current_user_sync)
 ):
     category = db.query(models.ProductCategory).filter(
         models.ProductCategory.id == category_id
@@ -1,130 +1,210 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, String, type_coerce
 from typing import List, Optional
 from app.models import models
 from app.schemas import schemas
 from app.db.database import SessionLocal
-from datetime import datetime
+from app.db.async_database import get_async_db
+from app.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.db.aggregates import period_bucket
+from app.db.low_stock import LOW_STOCK_KEYS, list_low_stock, low_stock_filter
+from app.db.pagination import paginate
+from app.db.stats_cache import cached_inventory_stats
+from app.routers.movements import list_movements
+from datetime import date, datetime, timedelta
 import csv
 from fastapi.responses import StreamingResponse
 from io import StringIO
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Export CSV : nombre de lignes lues et envoyées par morceau
+EXPORT_CHUNK_SIZE = 1000
+
+# Graphique : nombre maximal de jours renvoyés (jours vides compris)
+MAX_CHART_DAYS = 3660
+
 
 # --- 1️⃣ Statistiques globales ---
+# Mis en cache jusqu'à la prochaine écriture sur les produits ou les mouvements
 @router.get("/stats")
-def get_stats(db: Session = Depends(get_db)):
-    total_products = db.query(func.count(models.Product.id)).scalar()
-    total_stock = db.query(func.sum(models.Product.quantity)).scalar() or 0
-    total_entries = db.query(func.count(models.StockMovement.id)).filter(models.StockMovement.type == "IN").scalar()
-    total_exits = db.query(func.count(models.StockMovement.id)).filter(models.StockMovement.type == "OUT").scalar()
+async def get_stats(db: AsyncSession = Depends(get_async_db)):
+    stats = await db.run_sync(cached_inventory_stats)
     return {
-        "total_products": total_products,
-        "total_stock": total_stock,
-        "total_entries": total_entries,
-        "total_exits": total_exits
+        "total_products": stats["total_products"],
+        "total_stock": stats["total_stock"],
+        "total_entries": stats["total_entries"],
+        "total_exits": stats["total_exits"]
     }
 
 # --- 2️⃣ Historique des mouvements ---
 @router.get("/movements", response_model=List[schemas.StockMovement])
-def get_movement_history(
+async def get_movement_history(
+    response: Response,
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
     product_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(models.StockMovement)
+    return await db.run_sync(list_movements, response, limit, cursor,
+                             start_date=start_date, end_date=end_date, product_id=product_id)
+
+# --- 3️⃣ Entrées/Sorties par période ---
+# Lu depuis l'agrégat journalier : une ligne par période (jour, lundi de la semaine ou mois).
+# Les bornes de dates sont appliquées au jour près.
+def compute_movement_stats(db: Session, period: str, start_date: Optional[datetime], end_date: Optional[datetime]):
+    rollup = models.MovementDailyRollup
+    bucket = period_bucket(rollup.day, period, db.get_bind().dialect.name)
+    query = db.query(
+        bucket.label("period"),
+        func.sum(rollup.entries).label("entries"),
+        func.sum(rollup.exits).label("exits"),
+    )
     if start_date:
-        query = query.filter(models.StockMovement.timestamp >= start_date)
+        query = query.filter(rollup.day >= start_date.date())
     if end_date:
-        query = query.filter(models.StockMovement.timestamp <= end_date)
-    if product_id:
-        query = query.filter(models.StockMovement.product_id == product_id)
-    return query.order_by(models.StockMovement.timestamp.desc()).all()
+        query = query.filter(rollup.day <= end_date.date())
+
+    rows = query.group_by(bucket).order_by(bucket).all()
+    return [{"period": row.period, "entries": row.entries, "exits": row.exits} for row in rows]
 
-# --- 3️⃣ Entrées/Sorties par période ---
 @router.get("/movement-stats")
-def movement_stats(
+async def movement_stats(
     period: str = Query("day", regex="^(day|week|month)$"),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(
-        models.StockMovement.timestamp,
-        models.StockMovement.type,
-        models.StockMovement.quantity
-    )
-    if start_date:
-        query = query.filter(models.StockMovement.timestamp >= start_date)
-    if end_date:
-        query = query.filter(models.StockMovement.timestamp <= end_date)
-    
-    data = query.all()
-    result = {}
-    
-    for m in data:
-        if period == "day":
-            key = m.timestamp.date()
-        elif period == "week":
-            key = m.timestamp.isocalendar()[1]  # numéro de semaine
-        else:
-            key = m.timestamp.strftime("%Y-%m")  # mois
-        
-        if key not in result:
-            result[key] = {"entries": 0, "exits": 0}
-        
-        if m.type == "IN":
-            result[key]["entries"] += m.quantity
-        else:
-            result[key]["exits"] += m.quantity
-    
-    # Transformer en liste triée
-    final_result = [{"period": k, **v} for k, v in sorted(result.items())]
-    return final_result
+    return await db.run_sync(compute_movement_stats, period, start_date, end_date)
 
 # --- 4️⃣ Produits avec stock bas ---
 @router.get("/low-stock", response_model=List[schemas.Product])
-def get_low_stock_products(threshold: int = 5, db: Session = Depends(get_db)):
-    return db.query(models.Product).filter(models.Product.quantity < threshold).all()
+async def get_low_stock_products(
+    response: Response,
+    threshold: Optional[int] = None,
+    category_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.run_sync(list_low_stock, response, threshold, category_id, limit, cursor)
+
+def stream_csv(statement, header):
+    # Session propre au flux : celle de la requête est libérée avant la fin de l'envoi
+    db = SessionLocal()
+    try:
+        output = StringIO()
+        writer = csv.writer(output)
+        writer.writerow(header)
+        result = db.execute(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for rows in result.partitions():
+            writer.writerows(rows)
+            yield output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate(0)
+        if output.tell():
+            yield output.getvalue().encode("utf-8")
+    finally:
+        db.close()
 
 @router.get("/export/products")
-def export_products_csv(db: Session = Depends(get_db)):
-    products = db.query(models.Product).all()
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["ID", "Name", "Description", "Price", "Quantity", "Created At", "Image URL"])
-    for p in products:
-        writer.writerow([p.id, p.name, p.description, p.price, p.quantity, p.created_at, p.image_url])
-    output.seek(0)
-    return StreamingResponse(output, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=products.csv"})
+def export_products_csv():
+    statement = select(
+        models.Product.id, models.Product.name, models.Product.description, models.Product.price,
+        models.Product.quantity, models.Product.created_at, models.Product.image_url
+    ).order_by(models.Product.id)
+    header = ["ID", "Name", "Description", "Price", "Quantity", "Created At", "Image URL"]
+    return StreamingResponse(
+        stream_csv(statement, header),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=products.csv"}
+    )
+
+@router.get("/export/movements")
+def export_movements_csv(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    product_id: Optional[int] = None,
+):
+    statement = select(
+        models.StockMovement.id, models.StockMovement.product_id, models.Product.name,
+        type_coerce(models.StockMovement.type, String), models.StockMovement.quantity,
+        models.StockMovement.reason, models.StockMovement.user_id, models.StockMovement.timestamp
+    ).outerjoin(models.Product, models.Product.id == models.StockMovement.product_id)
+    if start_date:
+        statement = statement.where(models.StockMovement.timestamp >= start_date)
+    if end_date:
+        statement = statement.where(models.StockMovement.timestamp <= end_date)
+    if product_id:
+        statement = statement.where(models.StockMovement.product_id == product_id)
+    statement = statement.order_by(models.StockMovement.timestamp, models.StockMovement.id)
+    header = ["ID", "Product ID", "Product Name", "Type", "Quantity", "Reason", "User ID", "Timestamp"]
+    return StreamingResponse(
+        stream_csv(statement, header),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=movements.csv"}
+    )
+
+def low_stock_names(db: Session, response: Response, threshold, category_id, limit: int, cursor):
+    query = low_stock_filter(db.query(models.Product.id, models.Product.name), threshold, category_id)
+    return [p.name for p in paginate(query, LOW_STOCK_KEYS, cursor, limit, response)]
 
 @router.get("/notify/low-stock")
-def notify_low_stock(threshold: int = 5, db: Session = Depends(get_db)):
-    products = db.query(models.Product).filter(models.Product.quantity < threshold).all()
-    return {"low_stock_products": [p.name for p in products]}
+async def notify_low_stock(
+    response: Response,
+    threshold: Optional[int] = None,
+    category_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    names = await db.run_sync(low_stock_names, response, threshold, category_id, limit, cursor)
+    return {"low_stock_products": names}
 
+def _daily_totals(db: Session, start_date: Optional[date], end_date: Optional[date], product_id: Optional[int]):
+    rollup = models.MovementDailyRollup
+    query = db.query(
+        rollup.day,
+        func.sum(rollup.entries).label("entries"),
+        func.sum(rollup.exits).label("exits"),
+    )
+    if start_date:
+        query = query.filter(rollup.day >= start_date)
+    if end_date:
+        query = query.filter(rollup.day <= end_date)
+    if product_id:
+        query = query.filter(rollup.product_id == product_id)
+    return {row.day: (row.entries, row.exits) for row in query.group_by(rollup.day).all()}
+
+# Une ligne agrégée par jour, les jours sans mouvement sont complétés à zéro
 @router.get("/chart/movements")
-def chart_data(db: Session = Depends(get_db)):
-    data = db.query(models.StockMovement.timestamp, models.StockMovement.type, models.StockMovement.quantity).all()
+async def chart_data(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    product_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if start_date and end_date and (end_date - start_date).days >= MAX_CHART_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_CHART_DAYS} days")
+
+    totals = await db.run_sync(_daily_totals, start_date, end_date, product_id)
     chart = {"labels": [], "entries": [], "exits": []}
-    for m in data:
-        date = m.timestamp.date()
-        if date not in chart["labels"]:
-            chart["labels"].append(str(date))
-            chart["entries"].append(0)
-            chart["exits"].append(0)
-        idx = chart["labels"].index(str(date))
-        if m.type == "IN":
-            chart["entries"][idx] += m.quantity
-        else:
-            chart["exits"][idx] += m.quantity
+    if not totals and not (start_date and end_date):
+        return chart
+    first = start_date or min(totals)
+    last = end_date or max(totals)
+    if (last - first).days >= MAX_CHART_DAYS:
+        first = last - timedelta(days=MAX_CHART_DAYS - 1)
+
+    current = first
+    while current <= last:
+        entries, exits = totals.get(current, (0, 0))
+        chart["labels"].append(current.isoformat())
+        chart["entries"].append(entries)
+        chart["exits"].append(exits)
+        current += timedelta(days=1)
     return chart
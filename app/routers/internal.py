@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Query
+from app.authentification.hashing import hashing_pool
+from app.authentification.principals import principal_cache
+from app.db.async_database import get_async_engine
+from app.db.database import engine
+from app.db.pool_metrics import pool_status
+from app.db.sql_stats import statement_stats
+from app.db.stats_cache import cache_stats
+from app.routers.users import get_current_active_admin
+
+# Endpoints d'exploitation, réservés aux administrateurs
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    dependencies=[Depends(get_current_active_admin)],
+)
+
+@router.get("/cache")
+def get_cache_stats():
+    return {**cache_stats(), "principals": principal_cache.stats()}
+
+@router.get("/db-pool")
+def get_db_pool_stats():
+    return {"sync": pool_status(engine), "async": pool_status(get_async_engine())}
+
+@router.get("/sql-stats")
+def get_sql_stats(limit: int = Query(20, ge=1, le=200)):
+    # Requêtes normalisées les plus coûteuses (temps total) depuis le démarrage
+    return statement_stats.top(limit)
+
+@router.get("/password-hashing")
+def get_password_hashing_stats():
+    return hashing_pool.stats()
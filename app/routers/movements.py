@@ -1,41 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, update
+from collections import defaultdict
 from typing import List
 from app.models import models
 from app.schemas import schemas
-from app.db.database import SessionLocal
+from app.db.database import get_db
+from app.db.async_database import get_async_db
+from app.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
+from app.db.rollup import record_movements
+from app.db.counters import add, adjust_counters, movement_contribution, stock_change_delta
+from app.db.stats_cache import cached_inventory_stats
 from typing import List, Optional
 from datetime import datetime
 
 
 router = APIRouter(prefix="/movements", tags=["Stock Movements"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Taille maximale d'un lot pour /movements/bulk
+MAX_BULK_MOVEMENTS = 5000
+
+# Clé de pagination : du plus récent au plus ancien
+MOVEMENT_KEYS = [models.StockMovement.timestamp, models.StockMovement.id]
+
+
+def list_movements(db: Session, response: Response, limit: int, cursor: Optional[str] = None,
+                   type: Optional[str] = None, start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None, product_id: Optional[int] = None):
+    """Page de mouvements filtrés, du plus récent au plus ancien (exécutée via run_sync)."""
+    query = db.query(models.StockMovement)
+    if type:
+        query = query.filter(models.StockMovement.type == type)
+    if start_date:
+        query = query.filter(models.StockMovement.timestamp >= start_date)
+    if end_date:
+        query = query.filter(models.StockMovement.timestamp <= end_date)
+    if product_id:
+        query = query.filter(models.StockMovement.product_id == product_id)
+    return paginate(query, MOVEMENT_KEYS, cursor, limit, response, descending=True)
 
 # Liste tous les mouvements
 @router.get("/", response_model=List[schemas.StockMovement])
-def get_movements(db: Session = Depends(get_db)):
-    return db.query(models.StockMovement).all()
+async def get_movements(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.run_sync(list_movements, response, limit, cursor)
+
+def apply_stock_change(db: Session, product_id: int, type: schemas.MovementType, quantity: int) -> int:
+    """Applique la variation de stock en un seul UPDATE conditionnel et renvoie la nouvelle quantité.
+
+    La vérification du stock se fait dans la clause WHERE : deux sorties concurrentes
+    sur le même produit ne peuvent pas vendre deux fois les mêmes unités.
+    """
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
+    delta = quantity if type == schemas.MovementType.IN else -quantity
+
+    stmt = update(models.Product).where(models.Product.id == product_id)
+    if delta < 0:
+        stmt = stmt.where(models.Product.quantity >= quantity)
+    stmt = stmt.values(quantity=models.Product.quantity + delta)\
+               .returning(models.Product.quantity, models.Product.price, models.Product.min_stock)\
+               .execution_options(synchronize_session=False)
+    row = db.execute(stmt).first()
+
+    if row is None:
+        # Aucune ligne modifiée : produit inconnu ou stock insuffisant
+        exists = db.query(models.Product.id).filter(models.Product.id == product_id).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Product not found")
+        raise HTTPException(status_code=400, detail="Not enough stock")
+    adjust_counters(db.connection(), stock_change_delta(row.price, row.min_stock, row.quantity - delta, row.quantity))
+    return row.quantity
 
 # Ajouter un mouvement
 @router.post("/", response_model=schemas.StockMovement)
 def create_movement(movement: schemas.StockMovementCreate, db: Session = Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.id == movement.product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-
-    # Mettre à jour la quantité du produit
-    if movement.type == schemas.MovementType.IN:
-        product.quantity += movement.quantity
-    elif movement.type == schemas.MovementType.OUT:
-        if movement.quantity > product.quantity:
-            raise HTTPException(status_code=400, detail="Not enough stock")
-        product.quantity -= movement.quantity
+    apply_stock_change(db, movement.product_id, movement.type, movement.quantity)
 
     db_movement = models.StockMovement(**movement.dict())  # ⚡ Convertir Pydantic -> SQLAlchemy
     if isinstance(movement.type, str):
@@ -49,50 +94,123 @@ def create_movement(movement: schemas.StockMovementCreate, db: Session = Depends
     
     return response
 
+# Ajouter un lot de mouvements (terminaux de caisse, scanners d'entrepôt)
+@router.post("/bulk", response_model=schemas.StockMovementBulkReport)
+def create_movements_bulk(movements: List[schemas.StockMovementCreate], db: Session = Depends(get_db)):
+    if len(movements) > MAX_BULK_MOVEMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_MOVEMENTS} movements per batch")
+
+    # Une seule lecture des stocks, puis validation ligne à ligne dans l'ordre du lot
+    product_ids = {m.product_id for m in movements}
+    stock = dict(
+        db.query(models.Product.id, models.Product.quantity)
+        .filter(models.Product.id.in_(product_ids)).all()
+    ) if product_ids else {}
+
+    results = []
+    accepted = []
+    deltas = defaultdict(int)
+    for index, movement in enumerate(movements):
+        error = None
+        delta = movement.quantity if movement.type == schemas.MovementType.IN else -movement.quantity
+        if movement.product_id not in stock:
+            error = "Product not found"
+        elif movement.quantity <= 0:
+            error = "Quantity must be positive"
+        elif stock[movement.product_id] + delta < 0:
+            error = "Not enough stock"
+        if error:
+            results.append(schemas.StockMovementBulkResult(index=index, status="ERROR", detail=error))
+            continue
+        stock[movement.product_id] += delta
+        deltas[movement.product_id] += delta
+        accepted.append(index)
+        results.append(schemas.StockMovementBulkResult(index=index, status="OK"))
+
+    if not accepted:
+        return {"accepted": 0, "rejected": len(results), "results": results}
+
+    # Une mise à jour agrégée par produit, gardée contre les écritures concurrentes
+    counter_deltas = []
+    for product_id, delta in deltas.items():
+        if delta == 0:
+            continue
+        stmt = update(models.Product).where(models.Product.id == product_id)
+        if delta < 0:
+            stmt = stmt.where(models.Product.quantity >= -delta)
+        stmt = stmt.values(quantity=models.Product.quantity + delta)\
+                   .returning(models.Product.quantity, models.Product.price, models.Product.min_stock)\
+                   .execution_options(synchronize_session=False)
+        row = db.execute(stmt).first()
+        if row is None:
+            db.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail=f"Stock of product {product_id} changed during the batch, retry"
+            )
+        counter_deltas.append(stock_change_delta(row.price, row.min_stock, row.quantity - delta, row.quantity))
+
+    # Insertion multi-lignes de tous les mouvements acceptés
+    timestamp = datetime.utcnow()
+    rows = [
+        {
+            "product_id": movements[i].product_id,
+            "type": models.MovementType(movements[i].type.value),
+            "quantity": movements[i].quantity,
+            "reason": movements[i].reason,
+            "timestamp": timestamp,
+        }
+        for i in accepted
+    ]
+    # Les id sont attribués dans l'ordre des lignes du VALUES : triés, ils suivent le lot
+    ids = sorted(db.scalars(
+        insert(models.StockMovement).values(rows).returning(models.StockMovement.id)
+    ).all())
+    record_movements(db.connection(), [
+        (row["timestamp"], row["product_id"], row["type"], row["quantity"]) for row in rows
+    ])
+    adjust_counters(db.connection(), add(
+        *counter_deltas, *(movement_contribution(row["type"], row["quantity"]) for row in rows)
+    ))
+    db.commit()
+
+    for i, movement_id in zip(accepted, ids):
+        results[i].movement_id = movement_id
+    return {"accepted": len(accepted), "rejected": len(results) - len(accepted), "results": results}
+
 # Historique des mouvements
 @router.get("/history", response_model=List[schemas.StockMovement])
-def get_movement_history(start_date: Optional[datetime] = None,
-                         end_date: Optional[datetime] = None,
-                         db: Session = Depends(get_db)):
-    query = db.query(models.StockMovement)
-    if start_date:
-        query = query.filter(models.StockMovement.timestamp >= start_date)
-    if end_date:
-        query = query.filter(models.StockMovement.timestamp <= end_date)
-    return query.order_by(models.StockMovement.timestamp.desc()).all()
-
-# Statistiques (entrées / sorties)
-from sqlalchemy import func
+async def get_movement_history(response: Response,
+                               start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None,
+                               limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                               cursor: Optional[str] = None,
+                               db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(list_movements, response, limit, cursor,
+                             start_date=start_date, end_date=end_date)
 
+# Statistiques (quantités entrées / sorties), partagées avec le dashboard
 @router.get("/stats")
-def get_stats(db: Session = Depends(get_db)):
-    total_entries = db.query(func.sum(models.StockMovement.quantity))\
-                      .filter(models.StockMovement.type == "IN").scalar() or 0
-    total_exits = db.query(func.sum(models.StockMovement.quantity))\
-                    .filter(models.StockMovement.type == "OUT").scalar() or 0
-    total_products = db.query(func.count(models.Product.id)).scalar()
-    total_stock = db.query(func.sum(models.Product.quantity)).scalar() or 0
+async def get_stats(db: AsyncSession = Depends(get_async_db)):
+    stats = await db.run_sync(cached_inventory_stats)
     return {
-        "total_products": total_products,
-        "total_stock": total_stock,
-        "total_entries": total_entries,
-        "total_exits": total_exits
+        "total_products": stats["total_products"],
+        "total_stock": stats["total_stock"],
+        "total_entries": stats["entry_quantity"],
+        "total_exits": stats["exit_quantity"]
     }
 
 # Filtrage, recherche et pagination
 @router.get("/movements/", response_model=List[schemas.StockMovement])
-def get_movements(
+async def search_movements(
+    response: Response,
     type: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(models.StockMovement)
-    if type:
-        query = query.filter(models.StockMovement.type == type)
-    if start_date:
-        query = query.filter(models.StockMovement.timestamp >= start_date)
-    if end_date:
-        query = query.filter(models.StockMovement.timestamp <= end_date)
-    return query.all()
+    return await db.run_sync(list_movements, response, limit, cursor,
+                             type=type, start_date=start_date, end_date=end_date)
 
@@ -1,41 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, Query,  UploadFile, File
-from sqlalchemy.orm import Session 
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query,  UploadFile, File, Response
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, insert, text
+from pydantic import ValidationError
 from typing import List, Optional 
 from app.models import models
 from app.schemas import schemas
-from app.db.database import SessionLocal
-import shutil
-import os
-import uuid
+from app.db.database import get_db
+from app.db.async_database import get_async_db
+from app.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
+from app.db.search import search_page, search_products
+from app.db.low_stock import list_low_stock
+from app.db.counters import add, adjust_counters, product_contribution
+from app.db.images import acquire_image, collect_image, image_extension, release_image
+from app.core import storage
+from app.core.config import settings
+import csv
+import io
 
 
-UPLOAD_DIR = "uploads/"
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
+# Import CSV : taille des lots insérés et nombre d'erreurs détaillées renvoyées
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_ERRORS = 100
+IMPORT_OPTIONAL_FIELDS = ["description", "quantity", "min_stock"]
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Lectures : handlers async, la requête s'exécute via AsyncSession.run_sync sans occuper
+# de thread pendant l'attente de la base. Les relations sérialisées doivent être chargées
+# d'avance (selectinload) : aucun chargement paresseux n'est possible hors run_sync.
 
+def _list_products(db: Session, response: Response, search, limit: int, cursor, offset: int):
+    # Catégories chargées en une seule requête supplémentaire (pas de N+1)
+    query = db.query(models.Product).options(selectinload(models.Product.category))
+    if search:
+        dialect = db.get_bind().dialect.name
+        if offset and not cursor:
+            return [product for product, _ in search_products(query, search, dialect, limit, offset)]
+        return search_page(query, search, dialect, cursor, limit, response)
+    if offset and not cursor:
+        # Ancien mode offset, conservé pour les clients existants
+        return query.order_by(models.Product.id).offset(offset).limit(limit).all()
+    return paginate(query, [models.Product.id], cursor, limit, response)
 
-# Filtrage, recherche et pagination
+# Filtrage, recherche et pagination (curseur sur l'id, voir X-Next-Cursor)
+# Avec `search`, les résultats sont classés par pertinence (index plein texte)
 @router.get("/", response_model=List[schemas.Product])
-def get_products(
+async def get_products(
+    response: Response,
     search: str | None = None,
-    limit: int = 100,
-    offset: int = 0,
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    offset: int = Query(0, ge=0, deprecated=True),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(models.Product)
-    if search:
-        query = query.filter(models.Product.name.ilike(f"%{search}%"))
-    return query.offset(offset).limit(limit).all()
+    return await db.run_sync(_list_products, response, search, limit, cursor, offset)
 
 
 # Ajouter un produit
@@ -63,18 +82,101 @@ def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)
     db.refresh(db_product)
     return db_product
 
+def _parse_import_row(row: dict, category_ids: set, category_names: dict) -> dict:
+    data = {"name": row.get("name"), "price": row.get("price")}
+    for field in IMPORT_OPTIONAL_FIELDS:
+        if (row.get(field) or "").strip():
+            data[field] = row[field]
+
+    # Catégorie par id ou par nom, résolue sur la carte chargée une seule fois
+    category_id = (row.get("category_id") or "").strip()
+    category_name = (row.get("category") or "").strip()
+    if category_id:
+        data["category_id"] = category_id
+    elif category_name:
+        if category_name.lower() not in category_names:
+            raise ValueError(f"Unknown category '{category_name}'")
+        data["category_id"] = category_names[category_name.lower()]
+    else:
+        data["category_id"] = None
+
+    product = schemas.ProductCreate(**data)
+    if product.category_id is not None and product.category_id not in category_ids:
+        raise ValueError(f"Category with ID {product.category_id} does not exist")
+    return product.dict()
+
+# Import en masse depuis un CSV (colonnes : name, price, description, quantity, min_stock,
+# category_id ou category). Lecture en flux, insertion par lots.
+@router.post("/import", response_model=schemas.ProductImportReport)
+def import_products(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    categories = db.query(models.ProductCategory.id, models.ProductCategory.name).all()
+    category_ids = {c.id for c in categories}
+    category_names = {c.name.lower(): c.id for c in categories}
+
+    reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig", newline=""))
+    if not reader.fieldnames or not {"name", "price"} <= set(reader.fieldnames):
+        raise HTTPException(status_code=400, detail="CSV must have at least 'name' and 'price' columns")
+
+    report = {"imported": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    batch = []
+
+    def record_error(line, message):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_IMPORT_ERRORS:
+            report["errors"].append({"line": line, "error": message})
+        else:
+            report["errors_truncated"] = True
+
+    def flush():
+        if batch:
+            db.execute(insert(models.Product), batch)
+            adjust_counters(db.connection(), add(*(
+                product_contribution(row["quantity"], row["price"], row["min_stock"]) for row in batch
+            )))
+            db.commit()
+            report["imported"] += len(batch)
+            batch.clear()
+
+    line = 1
+    try:
+        for line, row in enumerate(reader, start=2):
+            try:
+                batch.append(_parse_import_row(row, category_ids, category_names))
+            except ValidationError as exc:
+                record_error(line, "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()))
+            except ValueError as exc:
+                record_error(line, str(exc))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # Fichier illisible : les lots déjà insérés sont conservés
+        record_error(line + 1, f"Unreadable CSV: {exc}")
+    flush()
+    return report
+
 # Récupérer un produit par ID
 @router.get("/{product_id}", response_model=schemas.Product)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    product = await db.get(models.Product, product_id, options=[selectinload(models.Product.category)])
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
+def _get_product_for_update(db: Session, product_id: int):
+    # Ligne verrouillée jusqu'au commit : les deltas des compteurs (calculés au flush depuis les
+    # valeurs chargées) ne peuvent pas partir d'une quantité modifiée entre-temps par un mouvement
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite ignore FOR UPDATE : une écriture neutre prend dès maintenant le verrou d'écriture
+        db.execute(text("UPDATE products SET id = id WHERE id = :id"), {"id": product_id})
+    return (
+        db.query(models.Product).filter(models.Product.id == product_id)
+        .populate_existing().with_for_update().first()
+    )
+
 # Mettre à jour un produit
 @router.put("/{product_id}", response_model=schemas.Product)
 def update_product(product_id: int, updated_product: schemas.ProductCreate, db: Session = Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    product = _get_product_for_update(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     for key, value in updated_product.dict().items():
@@ -86,43 +188,77 @@ def update_product(product_id: int, updated_product: schemas.ProductCreate, db:
 # Supprimer un produit
 @router.delete("/{product_id}")
 def delete_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    product = _get_product_for_update(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    image_hash = product.image_hash
+    if image_hash:
+        release_image(db, image_hash)
     db.delete(product)
     db.commit()
+    if image_hash:
+        collect_image(db, image_hash)
     return {"detail": "Product deleted"}
 
 # Upload image pour un produit
-@router.post("/upload-image/{product_id}")
+# Le fichier est lu par blocs (taille bornée, SHA-256 au fil de l'eau) et stocké sous son
+# empreinte : un contenu déjà connu n'est pas réécrit, seule sa référence est comptée.
+# Route déclarée avec ImageUploadRoute : un corps trop gros est refusé avant d'être lu.
 def upload_image(product_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)):
     product = db.query(models.Product).filter(models.Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-    if file.content_type not in ["image/jpeg", "image/png", "image/webp"]:
+    extension = storage.IMAGE_EXTENSIONS.get(file.content_type)
+    if extension is None:
         raise HTTPException(status_code=400, detail="Invalid image type")
 
-    extension = file.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{extension}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
-
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    product.image_url = f"/uploads/{filename}"
+    if file.size is not None and file.size > settings.MAX_IMAGE_BYTES:
+        raise storage.too_large(settings.MAX_IMAGE_BYTES)
+    sha256, size, staged = storage.stage_upload(file.file, settings.MAX_IMAGE_BYTES)
+    previous_hash = product.image_hash
+    try:
+        if previous_hash == sha256:
+            extension = image_extension(db, sha256)
+        else:
+            extension = acquire_image(db, sha256, extension, file.content_type, size)
+            if previous_hash:
+                release_image(db, previous_hash)
+        product.image_hash = sha256
+        product.image_url = f"/uploads/{storage.image_filename(sha256, extension)}"
+        db.commit()
+    except BaseException:
+        storage.discard_staged(staged)
+        raise
+    # Après le commit : le fichier n'apparaît que s'il est référencé
+    stored = storage.store_staged(staged, storage.image_filename(sha256, extension))
+    if previous_hash and previous_hash != sha256:
+        collect_image(db, previous_hash)
 
-    db.commit()
     db.refresh(product)
     return {
         "original_filename": file.filename,
-        "image_url": product.image_url
+        "image_url": product.image_url,
+        "sha256": sha256,
+        "size": size,
+        "deduplicated": not stored,
     }
 
+
+router.add_api_route(
+    "/upload-image/{product_id}", upload_image, methods=["POST"], route_class_override=storage.ImageUploadRoute
+)
+
 # --- 4️⃣ Produits avec stock bas ---
+# Sans seuil : produits sous leur propre min_stock. Paginé par curseur (X-Next-Cursor).
 @router.get("/stock/low-stock", response_model=List[schemas.Product])
-def get_low_stock_products(threshold: int = 5, db: Session = Depends(get_db)):
-    return db.query(models.Product).filter(models.Product.quantity < threshold).all()
+async def get_low_stock_products(
+    response: Response,
+    threshold: Optional[int] = None,
+    category_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.run_sync(list_low_stock, response, threshold, category_id, limit, cursor)
 
@@ -1,61 +1,30 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, case, cast, Float
 from typing import List, Optional
 from datetime import datetime, timedelta
 from app.models import models
 from app.schemas import schemas
-from app.db.database import SessionLocal
+from app.db.async_database import get_async_db
+from app.db.stats_cache import cached, cached_inventory_stats
+from app.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.db.low_stock import list_low_stock, low_stock_filter
 from app.authentification.auth import get_current_user
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+# Handlers async : les requêtes s'exécutent via AsyncSession.run_sync (voir app/db/async_database.py)
 
 @router.get("/dashboard", response_model=schemas.DashboardStats)
-def get_dashboard_stats(
-    db: Session = Depends(get_db),
+async def get_dashboard_stats(
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
-    total_products = db.query(func.count(models.Product.id)).scalar()
-    total_stock = db.query(func.sum(models.Product.quantity)).scalar() or 0
-    
-    # Valeur totale du stock
-    total_stock_value = db.query(
-        func.sum(models.Product.price * models.Product.quantity)
-    ).scalar() or 0.0
-    
-    total_entries = db.query(func.count(models.StockMovement.id)).filter(
-        models.StockMovement.type == models.MovementType.IN
-    ).scalar()
-    
-    total_exits = db.query(func.count(models.StockMovement.id)).filter(
-        models.StockMovement.type == models.MovementType.OUT
-    ).scalar()
-    
-    low_stock_count = db.query(func.count(models.Product.id)).filter(
-        models.Product.quantity < models.Product.min_stock
-    ).scalar()
-    
-    return {
-        "total_products": total_products,
-        "total_stock": total_stock,
-        "total_stock_value": total_stock_value,
-        "total_entries": total_entries,
-        "total_exits": total_exits,
-        "low_stock_count": low_stock_count
-    }
+    return await db.run_sync(cached_inventory_stats)
 
-@router.get("/stock-value")
-def get_stock_value_report(
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_user)
-):
+def _compute_stock_value(db: Session):
     # Valeur totale
     total_value = db.query(
         func.sum(models.Product.price * models.Product.quantity)
@@ -77,15 +46,17 @@ def get_stock_value_report(
         "by_category": category_data
     }
 
-@router.get("/movements/daily")
-def get_daily_movements(
-    date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
+def _stock_value(db: Session):
+    return cached(("reports.stock_value",), lambda: _compute_stock_value(db))
+
+@router.get("/stock-value")
+async def get_stock_value_report(
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
-    if not date:
-        date = datetime.utcnow().date()
-    
+    return await db.run_sync(_stock_value)
+
+def _daily_movements(db: Session, date):
     start_date = datetime.combine(date, datetime.min.time())
     end_date = datetime.combine(date, datetime.max.time())
     
@@ -94,78 +65,116 @@ def get_daily_movements(
         models.StockMovement.timestamp <= end_date
     ).all()
     
-    entries = sum(m.quantity for m in movements if m.type == models.MovementType.IN)
-    exits = sum(m.quantity for m in movements if m.type == models.MovementType.OUT)
+    # Totaux lus depuis l'agrégat journalier
+    rollup = models.MovementDailyRollup
+    entries, exits, count = db.query(
+        func.coalesce(func.sum(rollup.entries), 0),
+        func.coalesce(func.sum(rollup.exits), 0),
+        func.coalesce(func.sum(rollup.entry_count + rollup.exit_count), 0),
+    ).filter(rollup.day == date).one()
     
     return {
         "date": date.isoformat(),
-        "total_movements": len(movements),
+        "total_movements": count,
         "entries": entries,
         "exits": exits,
         "net_change": entries - exits,
         "movements": movements
     }
 
-@router.get("/alerts/low-stock")
-def get_low_stock_alerts(
-    threshold: Optional[int] = None,
-    db: Session = Depends(get_db),
+@router.get("/movements/daily")
+async def get_daily_movements(
+    date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
-    query = db.query(models.Product)
-    if threshold:
-        query = query.filter(models.Product.quantity < threshold)
-    else:
-        query = query.filter(models.Product.quantity < models.Product.min_stock)
-    
-    low_stock_products = query.all()
-    
+    if not date:
+        date = datetime.utcnow().date()
+    elif isinstance(date, datetime):
+        date = date.date()
+    return await db.run_sync(_daily_movements, date)
+
+def low_stock_alerts(db: Session, response: Response, threshold, category_id, limit: int, cursor):
+    # count : total des produits concernés, products : la page demandée
+    count = low_stock_filter(db.query(func.count(models.Product.id)), threshold, category_id).scalar()
     return {
-        "count": len(low_stock_products),
-        "products": low_stock_products
+        "count": count,
+        "products": list_low_stock(db, response, threshold, category_id, limit, cursor)
     }
 
-@router.get("/performance")
-def get_stock_performance(
-    days: int = 30,
-    db: Session = Depends(get_db),
+@router.get("/alerts/low-stock", response_model=schemas.LowStockAlert)
+async def get_low_stock_alerts(
+    response: Response,
+    threshold: Optional[int] = None,
+    category_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Mouvements sur la période
-    movements = db.query(models.StockMovement).filter(
-        models.StockMovement.timestamp >= start_date
-    ).all()
-    
-    # Calculer les métriques
-    total_entries = sum(m.quantity for m in movements if m.type == models.MovementType.IN)
-    total_exits = sum(m.quantity for m in movements if m.type == models.MovementType.OUT)
-    
-    # Produits avec rotation
-    products = db.query(models.Product).all()
-    performance_data = []
-    
-    for product in products:
-        product_movements = [
-            m for m in movements if m.product_id == product.id
-        ]
-        product_entries = sum(m.quantity for m in product_movements if m.type == models.MovementType.IN)
-        product_exits = sum(m.quantity for m in product_movements if m.type == models.MovementType.OUT)
-        
-        performance_data.append({
-            "product_id": product.id,
-            "product_name": product.name,
-            "current_stock": product.quantity,
-            "entries": product_entries,
-            "exits": product_exits,
-            "turnover_rate": product_exits / product.quantity if product.quantity > 0 else 0
-        })
-    
+    return await db.run_sync(low_stock_alerts, response, threshold, category_id, limit, cursor)
+
+def compute_stock_performance(db: Session, days: int, limit: int, category_id: Optional[int] = None):
+    # Fenêtre au jour près, lue depuis l'agrégat journalier
+    start_day = (datetime.utcnow() - timedelta(days=days)).date()
+    rollup = models.MovementDailyRollup
+
+    # Entrées / sorties par produit sur la période, calculées par la base
+    per_product = db.query(
+        rollup.product_id.label("product_id"),
+        func.sum(rollup.entries).label("entries"),
+        func.sum(rollup.exits).label("exits"),
+    ).filter(rollup.day >= start_day).group_by(rollup.product_id).subquery()
+
+    entries = func.coalesce(per_product.c.entries, 0)
+    exits = func.coalesce(per_product.c.exits, 0)
+    turnover_rate = case(
+        (models.Product.quantity > 0, cast(exits, Float) / models.Product.quantity),
+        else_=0.0
+    )
+
+    # Top N par rotation : ORDER BY ... LIMIT côté base
+    ranking = db.query(
+        models.Product.id, models.Product.name, models.Product.quantity,
+        entries.label("entries"), exits.label("exits"), turnover_rate.label("turnover_rate")
+    ).outerjoin(per_product, per_product.c.product_id == models.Product.id)
+    if category_id:
+        ranking = ranking.filter(models.Product.category_id == category_id)
+    top = ranking.order_by(turnover_rate.desc(), models.Product.id).limit(limit).all()
+
+    totals = db.query(
+        func.coalesce(func.sum(rollup.entries), 0),
+        func.coalesce(func.sum(rollup.exits), 0),
+    ).filter(rollup.day >= start_day)
+    if category_id:
+        totals = totals.join(models.Product, models.Product.id == rollup.product_id)\
+                       .filter(models.Product.category_id == category_id)
+    total_entries, total_exits = totals.one()
+
     return {
         "period_days": days,
         "total_entries": total_entries,
         "total_exits": total_exits,
         "net_change": total_entries - total_exits,
-        "product_performance": sorted(performance_data, key=lambda x: x["turnover_rate"], reverse=True)[:10]
-    }
\ No newline at end of file
+        "product_performance": [
+            {
+                "product_id": row.id,
+                "product_name": row.name,
+                "current_stock": row.quantity,
+                "entries": row.entries,
+                "exits": row.exits,
+                "turnover_rate": row.turnover_rate
+            }
+            for row in top
+        ]
+    }
+
+@router.get("/performance")
+async def get_stock_performance(
+    days: int = Query(30, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    category_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(get_current_user)
+):
+    return await db.run_sync(compute_stock_performance, days, limit, category_id)
@@ -3,20 +3,15 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.models import models
 from app.schemas import schemas
-from app.db.database import SessionLocal 
-from app.authentification.auth import get_password_hash, get_current_user
+from app.db.database import get_db
+from app.authentification.auth import get_password_hash, get_current_user_sync
+from app.authentification.principals import invalidate_principal
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 def get_current_active_admin(
-    current_user: schemas.User = Depends(get_current_user),
+    current_user: schemas.User = Depends(get_current_user_sync),
 ):
     if current_user.role.value.upper() != schemas.UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not enough permissions")
@@ -97,6 +92,7 @@ def update_user(
         user.hashed_password = get_password_hash(user_update.password)
     
     db.commit()
+    invalidate_principal(user_id)
     db.refresh(user)
     return user
 
@@ -113,6 +109,7 @@ def delete_user(
     # Désactiver plutôt que supprimer
     user.is_active = False
     db.commit()
+    invalidate_principal(user_id)
     return {"message": "User deactivated successfully"}
 
 @router.put("/{user_id}/reset-password")
@@ -128,4 +125,5 @@ def reset_user_password(
     
     user.hashed_password = get_password_hash(new_password)
     db.commit()
+    invalidate_principal(user_id)
     return {"message": "Password reset successfully"}
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -43,7 +43,7 @@ class ProductBase(BaseModel):
     name: str
     description: Optional[str] = None
     price: float
-    quantity: int = 0
+    quantity: int = Field(0, ge=0)  # Même règle que ck_products_quantity_non_negative
     min_stock: int = 5
     category_id: Optional[int] = 1
 
@@ -60,6 +60,16 @@ class Product(ProductBase):
     class Config:
         from_attributes = True
 
+class ProductImportError(BaseModel):
+    line: int
+    error: str
+
+class ProductImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ProductImportError]
+    errors_truncated: bool = False
+
 # --- MOUVEMENTS ---
 class StockMovementBase(BaseModel):
     product_id: int
@@ -78,6 +88,17 @@ class StockMovement(StockMovementBase):
     class Config:
         from_attributes = True
 
+class StockMovementBulkResult(BaseModel):
+    index: int
+    status: str  # OK, ERROR
+    movement_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class StockMovementBulkReport(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[StockMovementBulkResult]
+
 # --- NOUVEAU : AUTHENTIFICATION ---
 class UserBase(BaseModel):
     email: EmailStr
@@ -158,6 +179,10 @@ class StockValueReport(BaseModel):
     by_category: List[dict]
     by_metal: List[dict]  # Si vous avez le champ métal
 
+class LowStockAlert(BaseModel):
+    count: int
+    products: List[Product]
+
 class MovementTrend(BaseModel):
     period: str
     entries: int
@@ -0,0 +1,87 @@
+"""Requêtes par seconde à 500 clients simultanés : handlers async (AsyncSession) contre
+les mêmes lectures en handlers synchrones (SessionLocal, pool de threads AnyIO).
+
+Usage : python -m benchmarks.bench_async [clients] [requêtes par client]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_async.db")
+
+import httpx  # noqa: E402
+from fastapi import Depends, Response  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import Session, selectinload  # noqa: E402
+
+from app.db.async_database import get_async_engine  # noqa: E402
+from app.db.database import engine, get_db  # noqa: E402
+from app.db.pagination import paginate  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import models  # noqa: E402
+from app.routers.movements import list_movements  # noqa: E402
+from app.schemas import schemas  # noqa: E402
+
+
+# Lectures identiques servies par des handlers synchrones, comme avant le passage en async
+@app.get("/bench-sync/products", response_model=List[schemas.Product])
+def sync_products(response: Response, limit: int = 20, db: Session = Depends(get_db)):
+    query = db.query(models.Product).options(selectinload(models.Product.category))
+    return paginate(query, [models.Product.id], None, limit, response)
+
+
+@app.get("/bench-sync/movements", response_model=List[schemas.StockMovement])
+def sync_movements(response: Response, product_id: int, limit: int = 20, db: Session = Depends(get_db)):
+    return list_movements(db, response, limit, product_id=product_id)
+
+
+def seed():
+    with engine.begin() as conn:
+        conn.execute(insert(models.ProductCategory), [{"name": f"c{i}"} for i in range(10)])
+        conn.execute(insert(models.Product), [
+            {"name": f"p{i}", "price": 1, "quantity": 10, "category_id": i % 10 + 1} for i in range(1000)
+        ])
+        conn.execute(insert(models.StockMovement), [
+            {"product_id": i % 1000 + 1, "type": models.MovementType.IN, "quantity": 1} for i in range(20000)
+        ])
+
+
+async def run(url, clients, per_client):
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.get(url)  # préchauffage
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            for _ in range(per_client):
+                response = await client.get(url)
+                errors += response.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        return (clients * per_client - errors) / elapsed, errors, elapsed
+
+
+def main(clients, per_client):
+    engine.echo = False
+    models.Base.metadata.create_all(engine)
+    seed()
+    print(f"{clients} clients x {per_client} requêtes")
+    for label, url in [
+        ("produits (20)", "/products/?limit=20"),
+        ("produits (20), sync", "/bench-sync/products?limit=20"),
+        ("mouvements d'un produit", "/dashboard/movements?product_id=7&limit=20"),
+        ("mouvements d'un produit, sync", "/bench-sync/movements?product_id=7&limit=20"),
+    ]:
+        rps, errors, elapsed = asyncio.run(run(url, clients, per_client))
+        asyncio.run(get_async_engine().dispose())
+        print(f"  {label:32}: {rps:8.0f} req/s, {errors} erreurs, {elapsed:6.1f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500, int(sys.argv[2]) if len(sys.argv) > 2 else 10)
@@ -0,0 +1,50 @@
+"""Lignes/s : POST /movements/ ligne à ligne contre POST /movements/bulk.
+
+Usage : python -m benchmarks.bench_bulk_movements [lignes]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_bulk.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db.database import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import models  # noqa: E402
+
+
+def main(count):
+    engine.echo = False
+    models.Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        products = [models.Product(name=f"bench {i}", price=1, quantity=10_000) for i in range(20)]
+        db.add_all(products)
+        db.commit()
+        product_ids = [p.id for p in products]
+
+    payload = [
+        {"product_id": product_ids[i % len(product_ids)], "type": "OUT" if i % 3 else "IN", "quantity": 1}
+        for i in range(count)
+    ]
+    client = TestClient(app)
+
+    start = time.perf_counter()
+    for item in payload:
+        assert client.post("/movements/", json=item).status_code == 200
+    single = count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    response = client.post("/movements/bulk", json=payload)
+    bulk = count / (time.perf_counter() - start)
+    assert response.json()["accepted"] == count
+
+    print(f"{count} mouvements sur {len(product_ids)} produits (SQLite)")
+    print(f"  POST /movements/      {single:10.0f} lignes/s")
+    print(f"  POST /movements/bulk  {bulk:10.0f} lignes/s  (x{bulk / single:.0f})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,101 @@
+"""/dashboard/chart/movements sur un historique de mouvements volumineux.
+
+Usage : python -m benchmarks.bench_chart [mouvements]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_chart.db")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.db.async_database import AsyncSessionLocal, get_async_engine  # noqa: E402
+from app.db.database import SessionLocal, engine  # noqa: E402
+from app.db.rollup import rebuild_rollup  # noqa: E402
+from app.models import models  # noqa: E402
+from app.routers.dashboard import chart_data  # noqa: E402
+
+
+def legacy_chart(db):
+    # Ancienne implémentation, conservée pour comparaison
+    data = db.query(models.StockMovement.timestamp, models.StockMovement.type, models.StockMovement.quantity).all()
+    chart = {"labels": [], "entries": [], "exits": []}
+    for m in data:
+        date = m.timestamp.date()
+        if date not in chart["labels"]:
+            chart["labels"].append(str(date))
+            chart["entries"].append(0)
+            chart["exits"].append(0)
+        idx = chart["labels"].index(str(date))
+        if m.type == "IN":
+            chart["entries"][idx] += m.quantity
+        else:
+            chart["exits"][idx] += m.quantity
+    return chart
+
+
+def seed(count):
+    rng = random.Random(7)
+    start = datetime(2023, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Product), [{"name": f"p{i}", "price": 1, "quantity": 0} for i in range(50)])
+        for offset in range(0, count, 100_000):
+            conn.execute(insert(models.StockMovement), [
+                {
+                    "product_id": rng.randint(1, 50),
+                    "type": models.MovementType.IN if rng.random() < 0.5 else models.MovementType.OUT,
+                    "quantity": rng.randint(1, 5),
+                    "timestamp": start + timedelta(seconds=rng.randint(0, 730 * 86400)),
+                }
+                for _ in range(min(100_000, count - offset))
+            ])
+
+
+def chart(start_date=None, end_date=None, product_id=None):
+    async def run():
+        async with AsyncSessionLocal(bind=get_async_engine()) as db:
+            return await chart_data(start_date=start_date, end_date=end_date, product_id=product_id, db=db)
+    return asyncio.run(run())
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main(count):
+    engine.echo = False
+    models.Base.metadata.create_all(engine)
+    seed(count)
+    with SessionLocal() as db:
+        rebuild_rollup(db)  # insertions brutes : l'agrégat est recalculé
+    elapsed, result = timed(lambda: chart())
+    print(f"{count} mouvements sur 2 ans : {elapsed:8.0f} ms, {len(result['labels'])} jours")
+    elapsed, _ = timed(lambda: chart(start_date=datetime(2024, 6, 1).date(), end_date=datetime(2024, 6, 30).date()))
+    print(f"  juin 2024 seulement        : {elapsed:8.0f} ms")
+    elapsed, _ = timed(lambda: chart(product_id=7))
+    print(f"  un produit                 : {elapsed:8.0f} ms")
+
+    # L'ancienne version est quadratique : mesurée sur un extrait seulement
+    sample = 20_000
+    sample_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "legacy.db")
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    legacy_engine = create_engine(sample_url)
+    models.Base.metadata.create_all(legacy_engine)
+    with engine.connect() as source, legacy_engine.begin() as target:
+        rows = source.execute(models.StockMovement.__table__.select().limit(sample)).mappings().all()
+        target.execute(insert(models.StockMovement), [dict(r) for r in rows])
+    with sessionmaker(bind=legacy_engine)() as db:
+        elapsed, _ = timed(lambda: legacy_chart(db))
+        print(f"ancienne version, {sample} mouvements seulement : {elapsed:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,51 @@
+"""Pic mémoire de /dashboard/export/products selon la taille du catalogue.
+
+Usage : python -m benchmarks.bench_export [tailles...]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_export.db")
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app.db.database import engine  # noqa: E402
+from app.models import models  # noqa: E402
+from app.routers.dashboard import export_products_csv  # noqa: E402
+
+
+def seed(total):
+    with engine.begin() as conn:
+        current = conn.execute(select(func.count(models.Product.id))).scalar()
+        for start in range(current, total, 50_000):
+            rows = [
+                {"name": f"Produit {i}", "description": "Description " * 5, "price": 9.9, "quantity": i % 40}
+                for i in range(start, min(start + 50_000, total))
+            ]
+            conn.execute(insert(models.Product), rows)
+
+
+async def consume(response):
+    return sum([len(chunk) async for chunk in response.body_iterator])
+
+
+def main(sizes):
+    engine.echo = False
+    models.Base.metadata.create_all(engine)
+    for size in sizes:
+        seed(size)
+        tracemalloc.start()
+        start = time.perf_counter()
+        sent = asyncio.run(consume(export_products_csv()))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{size:>9} produits : {sent / 1e6:7.1f} Mo envoyés, pic {peak / 1e6:5.2f} Mo, {elapsed:5.1f} s")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 100_000, 1_000_000])
@@ -0,0 +1,69 @@
+"""Alertes de stock bas à 500k produits dont une poignée sous leur seuil.
+
+Compare le chemin commun (index partiels) au même chemin sans index partiel.
+
+Usage : python -m benchmarks.bench_low_stock [produits] [produits en stock bas]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_low_stock.db")
+
+from fastapi import Response  # noqa: E402
+from sqlalchemy import insert, text  # noqa: E402
+
+from app.db.database import SessionLocal, engine  # noqa: E402
+from app.models import models  # noqa: E402
+from app.routers.dashboard import low_stock_names  # noqa: E402
+from app.routers.reports import low_stock_alerts  # noqa: E402
+
+REPEAT = 20
+
+
+def seed(products, low):
+    rng = random.Random(5)
+    low_ids = set(rng.sample(range(products), low))
+    with engine.begin() as conn:
+        conn.execute(insert(models.ProductCategory), [{"name": f"c{i}"} for i in range(10)])
+        for offset in range(0, products, 100_000):
+            conn.execute(insert(models.Product), [
+                {"name": f"p{i}", "price": 1, "min_stock": 5, "category_id": i % 10 + 1,
+                 "quantity": rng.randint(0, 4) if i in low_ids else rng.randint(5, 500)}
+                for i in range(offset, min(products, offset + 100_000))
+            ])
+        conn.execute(text("ANALYZE"))
+
+
+def measure(label, call):
+    with SessionLocal() as db:
+        call(db)  # préchauffage
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            call(db)
+        print(f"  {label:38}: {(time.perf_counter() - start) * 1000 / REPEAT:8.2f} ms")
+
+
+def run(products, low):
+    measure("/reports/alerts/low-stock", lambda db: low_stock_alerts(db, Response(), None, None, 100, None))
+    measure("/reports/alerts/low-stock catégorie", lambda db: low_stock_alerts(db, Response(), None, 3, 100, None))
+    measure("/dashboard/notify/low-stock", lambda db: low_stock_names(db, Response(), None, None, 100, None))
+
+
+def main(products, low):
+    engine.echo = False
+    models.Base.metadata.create_all(engine)
+    seed(products, low)
+    print(f"{products} produits, {low} en stock bas — avec index partiels")
+    run(products, low)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_products_low_stock"))
+        conn.execute(text("DROP INDEX ix_products_low_stock_category"))
+    print("sans index partiels (parcours de products)")
+    run(products, low)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,62 @@
+"""/reports/performance à 5k produits et 500k mouvements.
+
+Usage : python -m benchmarks.bench_performance [produits] [mouvements]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_performance.db")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.db.database import SessionLocal, engine  # noqa: E402
+from app.db.rollup import rebuild_rollup  # noqa: E402
+from app.models import models  # noqa: E402
+from app.routers.reports import compute_stock_performance  # noqa: E402
+
+
+def seed(products, movements):
+    rng = random.Random(3)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(models.ProductCategory), [{"name": f"c{i}"} for i in range(10)])
+        conn.execute(insert(models.Product), [
+            {"name": f"p{i}", "price": 1, "quantity": rng.randint(0, 100), "category_id": i % 10 + 1}
+            for i in range(products)
+        ])
+        for offset in range(0, movements, 100_000):
+            conn.execute(insert(models.StockMovement), [
+                {
+                    "product_id": rng.randint(1, products),
+                    "type": models.MovementType.IN if rng.random() < 0.4 else models.MovementType.OUT,
+                    "quantity": rng.randint(1, 5),
+                    "timestamp": now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+                }
+                for _ in range(min(100_000, movements - offset))
+            ])
+
+
+def main(products, movements):
+    engine.echo = False
+    models.Base.metadata.create_all(engine)
+    seed(products, movements)
+    with SessionLocal() as db:
+        rebuild_rollup(db)  # insertions brutes : l'agrégat est recalculé
+    with SessionLocal() as db:
+        for label, kwargs in [
+            ("30 jours, top 10", {"days": 30, "limit": 10}),
+            ("365 jours, top 100", {"days": 365, "limit": 100}),
+            ("30 jours, une catégorie", {"days": 30, "limit": 10, "category_id": 3}),
+        ]:
+            start = time.perf_counter()
+            compute_stock_performance(db, **kwargs)
+            print(f"{products} produits x {movements} mouvements, {label:24}: "
+                  f"{(time.perf_counter() - start) * 1000:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000, int(sys.argv[2]) if len(sys.argv) > 2 else 500_000)
@@ -0,0 +1,67 @@
+"""Latence de la recherche produits : ILIKE '%terme%' contre l'index plein texte.
+
+Usage : python -m benchmarks.bench_search [nombre_de_produits]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.search import search_products
+from app.models import models
+
+WORDS = [
+    "collier", "bracelet", "bague", "montre", "broche", "perle", "argent", "or", "saphir",
+    "rubis", "diamant", "opale", "quartz", "chaine", "pendentif", "jonc", "gourmette", "email",
+]
+# Références rares (cas courant de la saisie) et mots très fréquents (pire cas du classement)
+TERMS = ["ref99999", "ref4242", "saphir", "perle arg", "gourmette jonc"]
+
+
+def seed(engine, count):
+    rng = random.Random(42)
+    rows = [
+        {
+            "name": " ".join(rng.choices(WORDS, k=3)) + f" ref{i}",
+            "description": " ".join(rng.choices(WORDS, k=12)),
+            "price": 10.0,
+            "quantity": 1,
+        }
+        for i in range(count)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(models.Product), rows)
+
+
+def timed(fn, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(count):
+    path = os.path.join(tempfile.mkdtemp(), "bench_search.db")
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(engine)
+    seed(engine, count)
+    db = sessionmaker(bind=engine)()
+
+    print(f"{count} produits, médiane sur 20 requêtes (limit=20)")
+    for term in TERMS:
+        # Dialecte inconnu -> repli ILIKE sur nom + description, sans index ni classement
+        ilike = timed(lambda: search_products(db.query(models.Product), term, "generic", 20).all())
+        fts = timed(lambda: search_products(db.query(models.Product), term, "sqlite", 20).all())
+        print(f"  {term!r:17} ilike={ilike:8.2f} ms  fts5={fts:8.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
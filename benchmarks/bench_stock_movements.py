@@ -0,0 +1,56 @@
+"""Débit des sorties de stock concurrentes sur un même produit, avec contrôle de survente.
+
+Usage : python -m benchmarks.bench_stock_movements [threads] [sorties] [DATABASE_URL]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import models
+from app.routers.movements import create_movement
+from app.schemas import schemas
+
+
+def main(threads, attempts, url):
+    engine = create_engine(url, connect_args={"timeout": 30} if url.startswith("sqlite") else {})
+    models.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    stock = attempts // 2
+    with Session() as db:
+        product = models.Product(name="bench", price=1, quantity=stock)
+        db.add(product)
+        db.commit()
+        product_id = product.id
+
+    def sell(_):
+        with Session() as db:
+            try:
+                create_movement(schemas.StockMovementCreate(product_id=product_id, type="OUT", quantity=1), db)
+                return True
+            except HTTPException:
+                return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        accepted = sum(pool.map(sell, range(attempts)))
+    elapsed = time.perf_counter() - start
+
+    with Session() as db:
+        remaining = db.get(models.Product, product_id).quantity
+    print(f"{engine.dialect.name}, {threads} threads, {attempts} sorties demandées pour {stock} unités")
+    print(f"  acceptées={accepted} stock_restant={remaining} survente={'NON' if accepted == stock and remaining == 0 else 'OUI'}")
+    print(f"  {attempts / elapsed:.0f} requêtes/s ({elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    attempts = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    default_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_movements.db")
+    main(threads, attempts, sys.argv[3] if len(sys.argv) > 3 else default_url)
@@ -1,5 +1,6 @@
 #!/bin/bash
 echo "=== Installation des dépendances ==="
+pip install -r requirements.txt -q
 pip install pytest pytest-asyncio httpx pytest-cov -q
 
 echo -e "\n=== Exécution des tests ==="
@@ -1,18 +1,31 @@
 import pytest
+import os
+
+# Base de données de test : l'application doit pointer sur la même base
+TEST_DATABASE_URL = "sqlite:///./test.db"
+os.environ.setdefault("DATABASE_URL", TEST_DATABASE_URL)
+
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from types import SimpleNamespace
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
 from app.db.database import Base, get_db, SessionLocal
-import os
-
-# Base de données de test en mémoire
-TEST_DATABASE_URL = "sqlite:///./test.db"
+from app.db.async_database import get_async_db, to_async_url
+from app.authentification.auth import get_current_user, get_current_user_sync
+from app.schemas import schemas
 engine = create_engine(
     TEST_DATABASE_URL, 
     connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Handlers async : même base ; NullPool car chaque TestClient tourne sur sa propre boucle
+async_engine = create_async_engine(to_async_url(TEST_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 # Créer les tables une fois
 @pytest.fixture(scope="session", autouse=True)
@@ -31,20 +44,67 @@ def db():
 
 @pytest.fixture
 def client(db):
-    # Override la dépendance get_db
+    # Override la dépendance get_db : une session par requête, sur la base de test
     def override_get_db():
+        request_db = TestingSessionLocal()
         try:
-            yield db
+            yield request_db
         finally:
-            db.close()
+            request_db.close()
+    
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as request_db:
+            yield request_db
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     
     with TestClient(app) as test_client:
         yield test_client
     
     app.dependency_overrides.clear()
 
+@pytest.fixture
+def no_auth():
+    # Routes protégées appelées sans utilisateur
+    for dependency in (get_current_user, get_current_user_sync):
+        app.dependency_overrides[dependency] = lambda: None
+    yield
+    for dependency in (get_current_user, get_current_user_sync):
+        app.dependency_overrides.pop(dependency, None)
+
+@pytest.fixture
+def admin():
+    # Routes réservées aux administrateurs (/internal)
+    user = SimpleNamespace(role=schemas.UserRole.ADMIN, is_active=True)
+    for dependency in (get_current_user, get_current_user_sync):
+        app.dependency_overrides[dependency] = lambda: user
+    yield user
+    for dependency in (get_current_user, get_current_user_sync):
+        app.dependency_overrides.pop(dependency, None)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def query_counter():
+    # Compte les requêtes SQL émises, toutes bases confondues
+    @contextmanager
+    def count():
+        statements = []
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", on_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", on_execute)
+
+    return count
+
 @pytest.fixture
 def auth_headers(client):
     # Créer un utilisateur de test d'abord
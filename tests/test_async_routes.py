@@ -0,0 +1,64 @@
+import asyncio
+import inspect
+import os
+import subprocess
+import sys
+import httpx
+import pytest
+from fastapi.routing import APIRoute
+from app.db.async_database import to_async_url
+from app.main import app
+from app.models import models
+from app.routers import dashboard, movements, products, reports
+
+
+def test_async_url_mapping():
+    """Test : choix du driver asynchrone d'après DATABASE_URL"""
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert to_async_url("postgresql://u:p@db:5432/stock") == "postgresql+asyncpg://u:p@db:5432/stock"
+    assert to_async_url("postgresql+psycopg2://u:p@db/stock") == "postgresql+asyncpg://u:p@db/stock"
+
+
+def test_import_without_async_driver():
+    """Test : l'application s'importe sans asyncpg ni aiosqlite installés"""
+    script = (
+        "import sys\n"
+        "class Block:\n"
+        "    def find_spec(self, name, path=None, target=None):\n"
+        "        if name.split('.')[0] in ('asyncpg', 'aiosqlite'):\n"
+        "            raise ImportError(name)\n"
+        "sys.meta_path.insert(0, Block())\n"
+        "import app.main\n"
+    )
+    env = {**os.environ, "DATABASE_URL": "postgresql://u:p@localhost:5432/stock", "ASYNC_DATABASE_URL": ""}
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_hot_read_routes_are_async():
+    """Test : les lectures des routeurs produits, mouvements, dashboard et rapports sont async"""
+    # Routes lues sur les routeurs eux-mêmes : app.routes n'expose que des routeurs inclus
+    routes = [
+        route for router in (products.router, movements.router, dashboard.router, reports.router)
+        for route in router.routes if isinstance(route, APIRoute) and "GET" in route.methods
+    ]
+    sync_reads = [
+        route.path for route in routes
+        if "/export/" not in route.path  # flux CSV : session dédiée dans un générateur
+        and not inspect.iscoroutinefunction(route.endpoint)
+    ]
+    assert len(routes) >= 15
+    assert sync_reads == []
+
+
+@pytest.mark.anyio
+async def test_concurrent_async_reads(db):
+    """Test : 100 lectures simultanées servies sans erreur"""
+    db.add(models.Product(name="Async", price=1, quantity=3))
+    db.commit()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*(
+            client.get(url) for url in ["/products/?limit=5", "/movements/?limit=5", "/dashboard/stats"] * 34
+        ))
+    assert [r.status_code for r in responses] == [200] * len(responses)
@@ -0,0 +1,50 @@
+from app.models import models
+
+
+def _product(db, quantity):
+    product = models.Product(name="Produit lot", price=10, quantity=quantity)
+    db.add(product)
+    db.commit()
+    return product.id
+
+
+def test_bulk_movements_report_per_item(client, db):
+    """Test lot mixte : résultat par ligne et stock agrégé"""
+    product_id = _product(db, 5)
+    payload = [
+        {"product_id": product_id, "type": "OUT", "quantity": 4},
+        {"product_id": product_id, "type": "OUT", "quantity": 4},   # refusé : reste 1
+        {"product_id": product_id, "type": "IN", "quantity": 10},
+        {"product_id": product_id, "type": "OUT", "quantity": 4},   # accepté après l'entrée
+        {"product_id": 999999, "type": "IN", "quantity": 1},
+        {"product_id": product_id, "type": "IN", "quantity": 0},
+    ]
+    response = client.post("/movements/bulk", json=payload)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["accepted"] == 3
+    assert report["rejected"] == 3
+    assert [r["status"] for r in report["results"]] == ["OK", "ERROR", "OK", "OK", "ERROR", "ERROR"]
+    assert report["results"][1]["detail"] == "Not enough stock"
+    assert report["results"][4]["detail"] == "Product not found"
+    assert all(r["movement_id"] for r in report["results"] if r["status"] == "OK")
+
+    db.expire_all()
+    assert db.get(models.Product, product_id).quantity == 7
+    assert db.query(models.StockMovement).filter(models.StockMovement.product_id == product_id).count() == 3
+
+
+def test_bulk_movements_statement_count(client, db, query_counter):
+    """Test lot de 200 lignes : une lecture, une mise à jour, une insertion, un agrégat, les compteurs"""
+    product_id = _product(db, 0)
+    payload = [{"product_id": product_id, "type": "IN", "quantity": 1} for _ in range(200)]
+    with query_counter() as statements:
+        response = client.post("/movements/bulk", json=payload)
+    assert response.json()["accepted"] == 200
+    assert len([s for s in statements if s.lstrip().upper().startswith(("SELECT", "UPDATE", "INSERT"))]) == 5
+
+
+def test_bulk_movements_size_limit(client):
+    """Test taille maximale d'un lot"""
+    payload = [{"product_id": 1, "type": "IN", "quantity": 1}] * 5001
+    assert client.post("/movements/bulk", json=payload).status_code == 400
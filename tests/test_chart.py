@@ -0,0 +1,55 @@
+from datetime import datetime
+from app.models import models
+
+
+def _product_with_movements(db, movements):
+    product = models.Product(name="Graphique", price=1, quantity=0)
+    db.add(product)
+    db.commit()
+    db.add_all([
+        models.StockMovement(product_id=product.id, type=t, quantity=q, timestamp=ts)
+        for t, q, ts in movements
+    ])
+    db.commit()
+    return product.id
+
+
+def test_chart_fills_missing_days(client, db):
+    """Test graphique : agrégation par jour et jours vides à zéro"""
+    IN, OUT = models.MovementType.IN, models.MovementType.OUT
+    product_id = _product_with_movements(db, [
+        (IN, 4, datetime(2018, 6, 1, 9)),
+        (IN, 1, datetime(2018, 6, 1, 17)),
+        (OUT, 2, datetime(2018, 6, 3, 12)),
+    ])
+    response = client.get("/dashboard/chart/movements", params={"product_id": product_id})
+    assert response.status_code == 200
+    assert response.json() == {
+        "labels": ["2018-06-01", "2018-06-02", "2018-06-03"],
+        "entries": [5, 0, 0],
+        "exits": [0, 0, 2],
+    }
+
+
+def test_chart_respects_date_range(client, db):
+    """Test graphique borné par start_date et end_date"""
+    product_id = _product_with_movements(db, [
+        (models.MovementType.IN, 3, datetime(2018, 7, 2, 23, 59)),
+        (models.MovementType.IN, 9, datetime(2018, 7, 5)),
+    ])
+    response = client.get("/dashboard/chart/movements", params={
+        "product_id": product_id, "start_date": "2018-07-01", "end_date": "2018-07-03",
+    })
+    assert response.json() == {
+        "labels": ["2018-07-01", "2018-07-02", "2018-07-03"],
+        "entries": [0, 3, 0],
+        "exits": [0, 0, 0],
+    }
+
+
+def test_chart_rejects_huge_range(client):
+    """Test graphique : plage de dates trop grande"""
+    response = client.get("/dashboard/chart/movements", params={
+        "start_date": "1900-01-01", "end_date": "2100-01-01",
+    })
+    assert response.status_code == 400
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from app.db.database import SessionLocal
+from app.models import models
+from app.routers.movements import create_movement
+from app.schemas import schemas
+
+
+def _sell(product_id, quantity):
+    db = SessionLocal()
+    try:
+        create_movement(
+            schemas.StockMovementCreate(product_id=product_id, type="OUT", quantity=quantity), db
+        )
+        return True
+    except HTTPException as exc:
+        assert exc.status_code == 400
+        return False
+    finally:
+        db.close()
+
+
+def test_concurrent_exits_never_oversell(db):
+    """Test sorties concurrentes : aucune survente"""
+    product = models.Product(name="Stock concurrent", price=10, quantity=50)
+    db.add(product)
+    db.commit()
+
+    # 120 demandes de 1 unité pour 50 unités en stock
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        results = list(pool.map(lambda _: _sell(product.id, 1), range(120)))
+
+    db.expire_all()
+    recorded = db.query(models.StockMovement).filter(models.StockMovement.product_id == product.id).count()
+    assert sum(results) == 50
+    assert recorded == 50
+    assert db.get(models.Product, product.id).quantity == 0
+
+
+def test_exit_larger_than_stock_leaves_quantity_untouched(db):
+    """Test sortie refusée : quantité inchangée"""
+    product = models.Product(name="Stock insuffisant", price=10, quantity=3)
+    db.add(product)
+    db.commit()
+
+    assert _sell(product.id, 4) is False
+    db.expire_all()
+    assert db.get(models.Product, product.id).quantity == 3
+
+
+def test_negative_quantity_rejected_by_api(client, db):
+    """Test quantité négative refusée en 422 à la création et à la modification (pas d'erreur 500)"""
+    body = {"name": "Stock négatif", "price": 10, "quantity": -1, "category_id": None}
+    assert client.post("/products/create", json=body).status_code == 422
+
+    product = models.Product(name="Stock négatif", price=10, quantity=3)
+    db.add(product)
+    db.commit()
+    assert client.put(f"/products/{product.id}", json=body).status_code == 422
+    db.refresh(product)
+    assert product.quantity == 3
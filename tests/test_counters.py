@@ -0,0 +1,137 @@
+import io
+import threading
+import uuid
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from app.db.counters import read_counters, rebuild_counters, verify_counters
+from app.db.database import SessionLocal
+from app.models import models
+from app.routers import products as products_router
+from app.routers.movements import create_movement
+from app.schemas import schemas
+
+
+@pytest.fixture
+def counters(db):
+    rebuild_counters(db)
+
+    def read():
+        db.expire_all()
+        return read_counters(db)
+    return read
+
+
+def test_counters_follow_every_write_path(client, db, counters):
+    """Test compteurs : CRUD produit, mouvements unitaires et en lot, import CSV"""
+    before = counters()
+    product = client.post("/products/create", json={
+        "name": f"Compteur {uuid.uuid4().hex[:8]}", "price": 2.5, "quantity": 4, "min_stock": 5, "category_id": None,
+    }).json()
+    after_create = counters()
+    assert after_create["total_products"] == before["total_products"] + 1
+    assert after_create["total_stock"] == before["total_stock"] + 4
+    assert after_create["low_stock_count"] == before["low_stock_count"] + 1
+
+    client.post("/movements/", json={"product_id": product["id"], "type": "IN", "quantity": 6})
+    client.post("/movements/bulk", json=[
+        {"product_id": product["id"], "type": "OUT", "quantity": 3},
+        {"product_id": product["id"], "type": "IN", "quantity": 1},
+    ])
+    assert client.put(f"/products/{product['id']}", json={
+        "name": product["name"], "price": 4.0, "quantity": 8, "min_stock": 1, "category_id": None,
+    }).status_code == 200
+    client.post("/products/import", files={"file": ("p.csv", io.BytesIO(b"name,price,quantity\nImporte,3,2\n"), "text/csv")})
+    after_writes = counters()
+    assert after_writes["total_entries"] == before["total_entries"] + 2
+    assert after_writes["exit_quantity"] == before["exit_quantity"] + 3
+    assert after_writes["total_stock"] == before["total_stock"] + 8 + 2
+    assert verify_counters(db) == {}
+
+
+def test_counters_follow_orm_writes(db, counters):
+    """Test compteurs : ajout, modification et suppression via l'ORM"""
+    before = counters()
+    product = models.Product(name="Compteur ORM", price=1)
+    db.add(product)
+    db.commit()
+    assert counters()["total_products"] == before["total_products"] + 1
+    assert counters()["low_stock_count"] == before["low_stock_count"] + 1  # quantité 0 < 5
+
+    product.quantity = 10
+    db.commit()
+    assert counters()["total_stock"] == before["total_stock"] + 10
+    assert counters()["low_stock_count"] == before["low_stock_count"]
+
+    db.delete(product)
+    db.commit()
+    assert counters() == before
+
+
+def test_counters_row_created_with_schema(tmp_path):
+    """Test compteurs : ligne créée par create_all, les premières écritures ne sont pas perdues"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'counters.db'}")
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        assert session.get(models.InventoryCounters, 1).total_products == 0
+        # Écriture avant toute lecture : le delta s'applique à la ligne déjà présente
+        session.add(models.Product(name="Premier", price=2, quantity=3))
+        session.commit()
+        assert read_counters(session)["total_products"] == 1
+        assert verify_counters(session) == {}
+    engine.dispose()
+
+
+def test_rebuild_counters_repairs_drift(db, counters):
+    """Test compteurs : une écriture hors ORM est corrigée par la reconstruction"""
+    db.execute(insert(models.Product), [{"name": "Hors compteurs", "price": 1, "quantity": 3}])
+    db.commit()
+    assert set(verify_counters(db)) >= {"total_products", "total_stock"}
+    rebuild_counters(db)
+    assert verify_counters(db) == {}
+
+
+def test_stats_read_counters(client, query_counter, counters):
+    """Test stats : une lecture d'une ligne, quelle que soit la taille des tables"""
+    from app.db.stats_cache import stats_cache
+    stats_cache.clear()
+    with query_counter() as statements:
+        client.get("/dashboard/stats")
+    assert len(statements) == 1
+    assert "inventory_counters" in statements[0]
+
+
+def test_update_concurrent_with_movement_keeps_counters(db, counters):
+    """Test compteurs : une sortie concurrente d'une modification de produit ne crée pas d'écart"""
+    product = models.Product(name=f"Concurrent {uuid.uuid4().hex[:8]}", price=2, quantity=10, min_stock=0)
+    db.add(product)
+    db.commit()
+    body = schemas.ProductCreate(name=product.name, price=2, quantity=12, min_stock=0, category_id=None)
+
+    def sell():
+        session = SessionLocal()
+        try:
+            create_movement(schemas.StockMovementCreate(product_id=product.id, type="OUT", quantity=3), session)
+        finally:
+            session.close()
+
+    # La sortie démarre entre le chargement du produit et le commit de la modification
+    writer = SessionLocal()
+    commit = writer.commit
+    seller = threading.Thread(target=sell)
+
+    def interleaved_commit():
+        seller.start()
+        seller.join(0.5)
+        commit()
+
+    writer.commit = interleaved_commit
+    try:
+        products_router.update_product(product.id, body, writer)
+    finally:
+        writer.close()
+    seller.join()
+
+    db.refresh(product)
+    assert product.quantity == 9  # modification à 12, puis sortie de 3 appliquée après
+    assert verify_counters(db) == {}
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from app.core.config import settings
+from app.db.database import engine
+from app.db.pool_metrics import TimedQueuePool, instrument_pool, pool_status
+
+
+def test_engine_uses_pool_settings():
+    """Test engine : réglages du pool lus dans Settings, echo désactivé"""
+    assert isinstance(engine.pool, TimedQueuePool)
+    assert engine.pool.size() == settings.DB_POOL_SIZE
+    assert engine.pool.timeout() == settings.DB_POOL_TIMEOUT
+    assert engine.echo is settings.DB_ECHO is False
+
+
+def test_pool_metrics_track_checkout_and_timeout(tmp_path):
+    """Test métriques : connexions empruntées, débordement et attentes expirées"""
+    small = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool, pool_size=1, max_overflow=1, pool_timeout=0.05,
+    )
+    metrics = instrument_pool(small)
+    first, second = small.connect(), small.connect()
+    status = pool_status(small)
+    assert status["checked_out"] == 2
+    assert status["overflow"] == 1
+    with pytest.raises(exc.TimeoutError):
+        small.connect()
+    first.close()
+    second.close()
+    status = pool_status(small)
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == status["checkins"] == 2
+    assert status["timeouts"] == 1
+    assert status["wait_max_ms"] >= 50
+    assert metrics.waits == 3
+    small.dispose()
+
+
+def test_db_pool_endpoint(client, admin):
+    """Test /internal/db-pool : état des pools sync et async"""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    response = client.get("/internal/db-pool")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["sync"]["size"] == settings.DB_POOL_SIZE
+    assert body["sync"]["checkouts"] >= 1
+    assert {"checked_out", "overflow", "wait_avg_ms", "wait_max_ms", "timeouts"} <= set(body["async"])
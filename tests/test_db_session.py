@@ -0,0 +1,130 @@
+import uuid
+from contextlib import contextmanager
+import anyio.to_thread
+import pytest
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+from app.authentification import auth
+from app.authentification.auth import create_access_token
+from app.authentification.principals import principal_cache
+from app.db.database import get_db
+from app.models import models
+from app.routers import categories, dashboard, internal, movements, products, reports, users
+
+
+class PoolUsage:
+    def __init__(self):
+        self.checkouts = 0
+        self.out = 0
+        self.max_out = 0
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        self.out += 1
+        self.max_out = max(self.max_out, self.out)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        self.out -= 1
+
+
+@contextmanager
+def pool_usage():
+    usage = PoolUsage()
+    event.listen(Pool, "checkout", usage.on_checkout)
+    event.listen(Pool, "checkin", usage.on_checkin)
+    try:
+        yield usage
+    finally:
+        event.remove(Pool, "checkout", usage.on_checkout)
+        event.remove(Pool, "checkin", usage.on_checkin)
+
+
+@pytest.fixture
+def headers(db):
+    name = f"session-{uuid.uuid4().hex[:8]}"
+    user = models.User(
+        email=f"{name}@test.com", username=name, full_name=name,
+        hashed_password="x", role=models.UserRole.ADMIN, is_active=True,
+    )
+    db.add(user)
+    db.commit()
+    principal_cache.clear()
+    token = create_access_token(data={"sub": user.username, "user_id": user.id})
+    yield {"Authorization": f"Bearer {token}"}
+    principal_cache.clear()
+
+
+def _dependency_calls(dependant):
+    for sub in dependant.dependencies:
+        yield sub.call
+        yield from _dependency_calls(sub)
+
+
+def test_routes_share_canonical_get_db():
+    """Test : toutes les routes synchrones utilisent le get_db de app.db"""
+    routers = [auth.router, users.router, products.router, movements.router,
+               dashboard.router, reports.router, categories.router, internal.router]
+    session_deps = set()
+    for router in routers:
+        for route in router.routes:
+            if isinstance(route, APIRoute):
+                session_deps |= {
+                    call for call in _dependency_calls(route.dependant)
+                    if getattr(call, "__name__", "") == "get_db"
+                }
+    assert session_deps == {get_db}
+
+
+@pytest.mark.parametrize("url", [
+    "/categories/",
+    # Handlers async (AsyncSession)
+    "/reports/dashboard",
+    "/reports/stock-value",
+    "/reports/alerts/low-stock",
+    "/reports/performance",
+])
+def test_authenticated_request_single_checkout(client, headers, url):
+    """Test : auth (cache froid) et handler, sync ou async, partagent une session, une seule connexion"""
+    # Cache des principaux vidé par la fixture : premier appel à froid
+    with pool_usage() as usage:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert usage.checkouts == 1
+
+    # À chaud : au plus la connexion du handler (aucune si sa réponse est en cache)
+    with pool_usage() as usage:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert usage.checkouts <= 1
+
+
+@pytest.mark.parametrize("url", [
+    "/reports/dashboard",
+    "/reports/stock-value",
+    "/reports/alerts/low-stock",
+    "/reports/performance",
+])
+def test_async_routes_skip_threadpool(client, headers, monkeypatch, url):
+    """Test : auth (cache froid) et handler async ne passent jamais par le pool de threads"""
+    hops = []
+    run_sync = anyio.to_thread.run_sync
+
+    async def counting_run_sync(func, *args, **kwargs):
+        hops.append(func)
+        return await run_sync(func, *args, **kwargs)
+
+    monkeypatch.setattr(anyio.to_thread, "run_sync", counting_run_sync)
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert hops == []
+
+
+def test_authenticated_write_single_connection(client, headers):
+    """Test : une écriture authentifiée n'a jamais deux connexions à la fois"""
+
+    # La connexion est rendue au commit puis reprise pour le refresh, jamais deux à la fois
+    with pool_usage() as usage:
+        response = client.post("/categories/", headers=headers, json={"name": f"Session {uuid.uuid4().hex[:8]}"})
+    assert response.status_code == 200
+    assert usage.max_out == 1
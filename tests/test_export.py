@@ -0,0 +1,51 @@
+import csv
+import io
+from datetime import datetime
+from app.models import models
+from app.routers import dashboard
+
+
+def _rows(response):
+    return list(csv.reader(io.StringIO(response.text)))
+
+
+def test_export_products_streams_in_chunks(client, db, monkeypatch):
+    """Test export produits par morceaux"""
+    monkeypatch.setattr(dashboard, "EXPORT_CHUNK_SIZE", 2)
+    db.add_all([models.Product(name=f"Export {i}", price=i, quantity=i) for i in range(5)])
+    db.commit()
+    expected = db.query(models.Product).count()
+
+    response = client.get("/dashboard/export/products")
+    assert response.status_code == 200
+    rows = _rows(response)
+    assert rows[0][:2] == ["ID", "Name"]
+    assert len(rows) == expected + 1
+    assert [int(r[0]) for r in rows[1:]] == sorted(int(r[0]) for r in rows[1:])
+
+
+def test_export_movements_with_date_filters(client, db):
+    """Test export mouvements filtré par dates"""
+    product = models.Product(name="Export mouvements", price=1, quantity=0)
+    db.add(product)
+    db.commit()
+    db.add_all([
+        models.StockMovement(product_id=product.id, type=models.MovementType.IN, quantity=3,
+                             timestamp=datetime(2023, 3, 1)),
+        models.StockMovement(product_id=product.id, type=models.MovementType.OUT, quantity=1,
+                             timestamp=datetime(2023, 3, 15)),
+        models.StockMovement(product_id=product.id, type=models.MovementType.IN, quantity=2,
+                             timestamp=datetime(2023, 5, 1)),
+    ])
+    db.commit()
+
+    response = client.get("/dashboard/export/movements", params={
+        "product_id": product.id, "start_date": "2023-03-01", "end_date": "2023-03-31",
+    })
+    assert response.status_code == 200
+    assert "filename=movements.csv" in response.headers["content-disposition"]
+    rows = _rows(response)
+    assert [(r[2], r[3], r[4]) for r in rows[1:]] == [
+        ("Export mouvements", "IN", "3"),
+        ("Export mouvements", "OUT", "1"),
+    ]
@@ -0,0 +1,201 @@
+import hashlib
+import os
+import uuid
+import pytest
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from app.core import storage
+from app.core.config import settings
+from app.db.images import collect_image, collect_orphans
+from app.main import app
+from app.models import models
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_DIR", str(tmp_path))
+    # Le montage /uploads sert le même répertoire
+    uploads = next(route.app for route in app.routes if getattr(route, "name", None) == "uploads")
+    monkeypatch.setattr(uploads, "all_directories", [str(tmp_path)])
+    return tmp_path
+
+
+def make_product(db):
+    product = models.Product(name=f"Image {uuid.uuid4().hex[:8]}", price=10, quantity=1, min_stock=0)
+    db.add(product)
+    db.commit()
+    return product
+
+
+def upload(client, product_id, content, content_type="image/png"):
+    return client.post(
+        f"/products/upload-image/{product_id}",
+        files={"file": ("photo.png", content, content_type)},
+    )
+
+
+def stored_image(db, sha256):
+    db.expire_all()
+    return db.query(models.StoredImage).filter(models.StoredImage.sha256 == sha256).first()
+
+
+def test_same_image_stored_once(client, db, upload_dir):
+    """Test upload : une même photo pour deux produits n'est écrite qu'une fois"""
+    content = b"\x89PNG" + uuid.uuid4().bytes * 5000
+    sha256 = hashlib.sha256(content).hexdigest()
+    first, second = make_product(db), make_product(db)
+
+    body = upload(client, first.id, content).json()
+    assert body["sha256"] == sha256
+    assert body["size"] == len(content)
+    assert body["image_url"] == f"/uploads/{sha256}.png"
+    assert body["deduplicated"] is False
+
+    body = upload(client, second.id, content).json()
+    assert body["deduplicated"] is True
+    assert os.listdir(upload_dir) == [f"{sha256}.png"]
+    assert (upload_dir / f"{sha256}.png").read_bytes() == content
+    assert stored_image(db, sha256).ref_count == 2
+
+    # Même image renvoyée pour le même produit : pas de référence en plus
+    upload(client, second.id, content)
+    assert stored_image(db, sha256).ref_count == 2
+
+
+def test_upload_size_limit(client, db, upload_dir, monkeypatch):
+    """Test upload : au-delà de MAX_IMAGE_BYTES, 413 et aucun fichier laissé"""
+    monkeypatch.setattr(settings, "MAX_IMAGE_BYTES", 1024)
+    product = make_product(db)
+    response = upload(client, product.id, b"x" * 2048)
+    assert response.status_code == 413
+    assert os.listdir(upload_dir) == []
+    assert upload(client, product.id, b"x" * 10, "text/plain").status_code == 400
+
+
+def test_oversized_upload_rejected_before_body_read(client, db, upload_dir, monkeypatch):
+    """Test upload : Content-Length trop grand, 413 sans lire le formulaire"""
+    monkeypatch.setattr(settings, "MAX_IMAGE_BYTES", 1024)
+    forms = []
+    form = Request.form
+
+    def counting_form(self, *args, **kwargs):
+        forms.append(self.url.path)
+        return form(self, *args, **kwargs)
+
+    monkeypatch.setattr(Request, "form", counting_form)
+    product = make_product(db)
+    response = upload(client, product.id, b"x" * (1024 + storage.MULTIPART_OVERHEAD + 1))
+    assert response.status_code == 413
+    assert forms == []
+    assert os.listdir(upload_dir) == []
+    # Sous la marge multipart : formulaire lu, refusé d'après la taille du fichier
+    assert upload(client, product.id, b"x" * 2048).status_code == 413
+    assert forms == [f"/products/upload-image/{product.id}"]
+
+
+def test_delete_product_collects_image(client, db, upload_dir):
+    """Test suppression : l'image n'est supprimée qu'avec sa dernière référence"""
+    content = uuid.uuid4().bytes * 100
+    sha256 = hashlib.sha256(content).hexdigest()
+    first, second = make_product(db), make_product(db)
+    upload(client, first.id, content)
+    upload(client, second.id, content)
+
+    assert client.delete(f"/products/{first.id}").status_code == 200
+    assert stored_image(db, sha256).ref_count == 1
+    assert (upload_dir / f"{sha256}.png").exists()
+
+    assert client.delete(f"/products/{second.id}").status_code == 200
+    assert stored_image(db, sha256) is None
+    assert os.listdir(upload_dir) == []
+
+
+def test_replace_image_releases_previous(client, db, upload_dir):
+    """Test remplacement : l'ancienne image orpheline est ramassée"""
+    product = make_product(db)
+    old, new = uuid.uuid4().bytes * 10, uuid.uuid4().bytes * 10
+    old_sha = upload(client, product.id, old).json()["sha256"]
+    new_sha = upload(client, product.id, new, "image/webp").json()["sha256"]
+
+    assert stored_image(db, old_sha) is None
+    assert stored_image(db, new_sha).ref_count == 1
+    assert os.listdir(upload_dir) == [f"{new_sha}.webp"]
+
+
+def test_collect_removes_file_before_commit(db, upload_dir, monkeypatch):
+    """Test GC : fichier supprimé avant le commit du DELETE (un envoi concurrent attend ce commit)"""
+    sha256 = "c" * 64
+    db.add(models.StoredImage(sha256=sha256, extension="png", content_type="image/png", size=1, ref_count=0))
+    db.commit()
+    (upload_dir / f"{sha256}.png").write_bytes(b"c")
+    row_visible = []
+    remove_image = storage.remove_image
+
+    def spy(filename):
+        # Vu d'une autre connexion, la ligne n'est pas encore supprimée
+        with Session(db.get_bind()) as other:
+            row_visible.append(other.get(models.StoredImage, sha256) is not None)
+        remove_image(filename)
+
+    monkeypatch.setattr(storage, "remove_image", spy)
+    assert collect_image(db, sha256)
+    assert row_visible == [True]
+    assert os.listdir(upload_dir) == []
+    assert stored_image(db, sha256) is None
+
+
+def test_collect_orphans(db, upload_dir):
+    """Test GC : fichiers sans ligne et envois abandonnés supprimés, images référencées gardées"""
+    kept = "a" * 64
+    db.add(models.StoredImage(sha256=kept, extension="png", content_type="image/png", size=1, ref_count=1))
+    db.commit()
+    (upload_dir / f"{kept}.png").write_bytes(b"k")
+    (upload_dir / f"{'b' * 64}.jpg").write_bytes(b"o")
+    staging = upload_dir / f"{storage.STAGING_PREFIX}abc.part"
+    staging.write_bytes(b"s")
+    os.utime(staging, (0, 0))
+    (upload_dir / "legacy-uuid.png").write_bytes(b"l")
+
+    assert collect_orphans(db) == 2
+    assert sorted(os.listdir(upload_dir)) == sorted([f"{kept}.png", "legacy-uuid.png"])
+    db.delete(db.get(models.StoredImage, kept))
+    db.commit()
+
+
+def test_uploads_served_with_immutable_cache(client, db, upload_dir):
+    """Test /uploads : image par contenu servie avec ETag fort, cache immutable, 304 et Range"""
+    content = uuid.uuid4().bytes * 64
+    sha256 = hashlib.sha256(content).hexdigest()
+    image_url = upload(client, make_product(db).id, content).json()["image_url"]
+
+    response = client.get(image_url)
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == f'"{sha256}"'
+    assert response.headers["cache-control"] == storage.IMMUTABLE_CACHE_CONTROL
+    assert "last-modified" in response.headers
+
+    response = client.get(image_url, headers={"If-None-Match": f'"{sha256}"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["cache-control"] == storage.IMMUTABLE_CACHE_CONTROL
+
+    response = client.get(image_url, headers={"Range": "bytes=16-31"})
+    assert response.status_code == 206
+    assert response.content == content[16:32]
+    assert response.headers["content-range"] == f"bytes 16-31/{len(content)}"
+
+
+def test_legacy_uploads_revalidated(client, upload_dir):
+    """Test /uploads : anciens noms UUID revalidés (no-cache) avec 304 sur Last-Modified"""
+    (upload_dir / "legacy-uuid.jpg").write_bytes(b"legacy")
+    response = client.get("/uploads/legacy-uuid.jpg")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == storage.REVALIDATE_CACHE_CONTROL
+
+    revalidated = client.get(
+        "/uploads/legacy-uuid.jpg", headers={"If-Modified-Since": response.headers["last-modified"]},
+    )
+    assert revalidated.status_code == 304
+    assert client.get("/uploads/missing.png").status_code == 404
@@ -0,0 +1,88 @@
+import uuid
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+from app.db.low_stock import LOW_STOCK_KEYS, low_stock_filter
+from app.db.pagination import apply_keyset
+from app.models import models
+
+LOW_STOCK_URLS = ["/products/stock/low-stock", "/dashboard/low-stock", "/reports/alerts/low-stock"]
+
+
+@pytest.fixture
+def category_stock(db):
+    category = models.ProductCategory(name=f"Stock bas {uuid.uuid4().hex[:8]}")
+    db.add(category)
+    db.commit()
+    products = [
+        models.Product(name=f"Bas {i}", price=1, quantity=i, min_stock=4, category_id=category.id)
+        for i in range(7)  # 0..3 sous le seuil, 4..6 au-dessus
+    ]
+    db.add_all(products)
+    db.commit()
+    return category.id, [p.id for p in products[:4]]
+
+
+def _ids(body):
+    products = body["products"] if isinstance(body, dict) else body
+    return [p["id"] for p in products]
+
+
+@pytest.mark.parametrize("url", LOW_STOCK_URLS)
+def test_low_stock_by_min_stock_and_category(client, no_auth, category_stock, url):
+    """Test stock bas : produits sous leur min_stock, filtrés par catégorie"""
+    category_id, low_ids = category_stock
+    response = client.get(url, params={"category_id": category_id})
+    assert response.status_code == 200
+    assert _ids(response.json()) == low_ids
+    assert _ids(client.get(url, params={"category_id": category_id, "threshold": 2}).json()) == low_ids[:2]
+
+
+@pytest.mark.parametrize("url", LOW_STOCK_URLS + ["/dashboard/notify/low-stock"])
+def test_low_stock_cursor_pagination(client, no_auth, category_stock, url):
+    """Test stock bas : pagination par curseur sans doublon"""
+    category_id, low_ids = category_stock
+    pages, cursor = [], None
+    while True:
+        params = {"category_id": category_id, "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        body = response.json()
+        pages.append(body["low_stock_products"] if "low_stock_products" in body else _ids(body))
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert [len(page) for page in pages] == [3, 1]
+
+
+def test_low_stock_alert_count_is_total(client, no_auth, category_stock):
+    """Test alertes : count reflète le total, pas la page"""
+    category_id, low_ids = category_stock
+    body = client.get("/reports/alerts/low-stock", params={"category_id": category_id, "limit": 1}).json()
+    assert body["count"] == len(low_ids)
+    assert len(body["products"]) == 1
+
+
+@pytest.mark.parametrize("category_id, index", [
+    (None, "ix_products_low_stock"),
+    (1, "ix_products_low_stock_category"),
+])
+def test_low_stock_uses_partial_index(tmp_path, category_id, index):
+    """Test EXPLAIN : la recherche sans seuil passe par un index partiel"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'low_stock.db'}")
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Product), [
+            {"name": f"p{i}", "price": 1, "quantity": 0 if i % 500 == 0 else 50, "min_stock": 5, "category_id": i % 7}
+            for i in range(5000)
+        ])
+        conn.execute(text("ANALYZE"))  # statistiques, comme après la migration 0004
+    with Session(engine) as db:
+        query = low_stock_filter(db.query(models.Product), category_id=category_id)
+        query = apply_keyset(query, LOW_STOCK_KEYS, None, 100)
+        sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+        plan = " | ".join(row[-1] for row in db.execute(text("EXPLAIN QUERY PLAN " + sql)))
+    engine.dispose()
+    assert f"USING INDEX {index}" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,94 @@
+from datetime import datetime
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.db.pagination import apply_keyset
+from app.models import models
+from app.routers.movements import MOVEMENT_KEYS
+
+
+@pytest.fixture(scope="module")
+def migrated_engine(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('alembic') / 'migrated.db'}"
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+def _plan(engine, query) -> str:
+    sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return " | ".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+
+def test_migrations_match_models(migrated_engine):
+    """Test : upgrade head produit exactement le schéma des modèles"""
+    with migrated_engine.connect() as conn:
+        context = MigrationContext.configure(conn)
+        diff = [d for d in compare_metadata(context, models.Base.metadata)
+                if not (d[0] == "remove_table" and d[1].name.startswith("products_fts"))]
+    assert diff == []
+
+
+def test_downgrade_to_baseline(tmp_path):
+    """Test : les migrations se rejouent dans les deux sens"""
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{tmp_path / 'roundtrip.db'}")
+    command.upgrade(config, "head")
+    command.downgrade(config, "0001")
+    command.upgrade(config, "head")
+
+
+def test_counters_seeded_from_existing_rows(tmp_path):
+    """Test migration 0002 : la ligne des compteurs reprend les données existantes"""
+    url = f"sqlite:///{tmp_path / 'seeded.db'}"
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "0001")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO products (id, name, price, quantity, min_stock) VALUES (1, 'a', 2.5, 4, 5)"))
+        conn.execute(text("INSERT INTO stock_movements (product_id, type, quantity, timestamp) VALUES (1, 'IN', 6, '2024-01-02 10:00:00')"))
+    command.upgrade(config, "head")
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT * FROM inventory_counters")).mappings().one()
+    engine.dispose()
+    assert dict(row) == {
+        "id": 1, "total_products": 1, "total_stock": 4, "total_stock_value": 10.0, "low_stock_count": 1,
+        "total_entries": 1, "total_exits": 0, "entry_quantity": 6, "exit_quantity": 0,
+    }
+
+
+@pytest.mark.parametrize("build, index", [
+    # Historique d'un produit, plus récent d'abord (GET /dashboard/movements?product_id=)
+    (lambda q: apply_keyset(q.filter(models.StockMovement.product_id == 1), MOVEMENT_KEYS, None, 100, True),
+     "ix_stock_movements_product_id_timestamp"),
+    # Export / statistiques par type sur une période
+    (lambda q: q.filter(models.StockMovement.type == models.MovementType.OUT,
+                        models.StockMovement.timestamp >= datetime(2024, 1, 1)),
+     "ix_stock_movements_type_timestamp"),
+    (lambda q: q.filter(models.StockMovement.user_id == 1), "ix_stock_movements_user_id"),
+])
+def test_movement_queries_use_indexes(migrated_engine, build, index):
+    """Test EXPLAIN : les requêtes sur les mouvements utilisent un index"""
+    with Session(migrated_engine) as db:
+        plan = _plan(migrated_engine, build(db.query(models.StockMovement)))
+    assert f"SEARCH stock_movements USING INDEX {index}" in plan, plan
+
+
+@pytest.mark.parametrize("build, index", [
+    (lambda q: q.filter(models.Product.category_id == 1), "ix_products_category_id"),
+    (lambda q: q.filter(models.Product.quantity < 5), "ix_products_quantity"),
+])
+def test_product_queries_use_indexes(migrated_engine, build, index):
+    """Test EXPLAIN : les filtres catégorie et stock utilisent un index"""
+    with Session(migrated_engine) as db:
+        plan = _plan(migrated_engine, build(db.query(models.Product)))
+    assert f"SEARCH products USING INDEX {index}" in plan, plan
@@ -0,0 +1,64 @@
+from datetime import datetime
+import pytest
+from app.db.counters import rebuild_counters
+from app.db.rollup import rebuild_rollup
+from app.models import models
+
+
+@pytest.fixture
+def movements_2016(db):
+    product = models.Product(name="Stats période", price=1, quantity=0)
+    db.add(product)
+    db.commit()
+    IN, OUT = models.MovementType.IN, models.MovementType.OUT
+    db.add_all([
+        models.StockMovement(product_id=product.id, type=t, quantity=q, timestamp=ts)
+        for t, q, ts in [
+            (IN, 10, datetime(2016, 1, 4, 9)),    # lundi, semaine 1 de 2016
+            (OUT, 3, datetime(2016, 1, 10, 18)),  # dimanche, même semaine
+            (IN, 5, datetime(2016, 1, 11, 8)),    # semaine 2
+            (OUT, 2, datetime(2017, 1, 2, 12)),   # semaine 1 de 2017
+        ]
+    ])
+    db.commit()
+    yield
+    db.query(models.StockMovement).filter(models.StockMovement.product_id == product.id).delete()
+    db.delete(product)
+    db.commit()
+    rebuild_rollup(db)
+    rebuild_counters(db)
+
+
+def _stats(client, period):
+    response = client.get("/dashboard/movement-stats", params={
+        "period": period, "start_date": "2016-01-01T00:00:00", "end_date": "2017-12-31T23:59:59",
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_movement_stats_by_day(client, movements_2016):
+    """Test regroupement par jour"""
+    assert _stats(client, "day") == [
+        {"period": "2016-01-04", "entries": 10, "exits": 0},
+        {"period": "2016-01-10", "entries": 0, "exits": 3},
+        {"period": "2016-01-11", "entries": 5, "exits": 0},
+        {"period": "2017-01-02", "entries": 0, "exits": 2},
+    ]
+
+
+def test_movement_stats_weeks_do_not_mix_years(client, movements_2016):
+    """Test semaines : la semaine 1 de 2016 et celle de 2017 restent distinctes"""
+    assert _stats(client, "week") == [
+        {"period": "2016-01-04", "entries": 10, "exits": 3},
+        {"period": "2016-01-11", "entries": 5, "exits": 0},
+        {"period": "2017-01-02", "entries": 0, "exits": 2},
+    ]
+
+
+def test_movement_stats_by_month(client, movements_2016):
+    """Test regroupement par mois"""
+    assert _stats(client, "month") == [
+        {"period": "2016-01", "entries": 15, "exits": 3},
+        {"period": "2017-01", "entries": 0, "exits": 2},
+    ]
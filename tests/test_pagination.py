@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from app.models import models
+
+
+def _seed_products(db, count):
+    products = [models.Product(name=f"Pagination {i}", price=10, quantity=20) for i in range(count)]
+    db.add_all(products)
+    db.commit()
+    return [p.id for p in products]
+
+
+def _seed_movements(db, product_id, count):
+    # Horodatages en double pour vérifier le départage par id
+    base = datetime(2024, 1, 1)
+    movements = [
+        models.StockMovement(
+            product_id=product_id,
+            type=models.MovementType.IN,
+            quantity=1,
+            timestamp=base + timedelta(minutes=i // 2),
+        )
+        for i in range(count)
+    ]
+    db.add_all(movements)
+    db.commit()
+    return [m.id for m in movements]
+
+
+def _walk(client, url, limit):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        seen.extend(item["id"] for item in page)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return seen
+
+
+def test_products_cursor_walks_every_row_once(client, db):
+    """Test parcours complet des produits par curseur"""
+    ids = _seed_products(db, 7)
+    seen = _walk(client, "/products/", 3)
+    assert [i for i in seen if i in ids] == ids
+    assert len(seen) == len(set(seen))
+
+
+def test_movements_cursor_is_newest_first(client, db):
+    """Test pagination des mouvements sur (timestamp, id) décroissant"""
+    product_id = _seed_products(db, 1)[0]
+    ids = _seed_movements(db, product_id, 9)
+    for url in ["/movements/", "/movements/history", "/movements/movements/", "/dashboard/movements"]:
+        seen = [i for i in _walk(client, url, 4) if i in ids]
+        assert seen == sorted(ids, reverse=True)
+
+
+def test_page_size_is_bounded(client):
+    """Test taille de page maximale"""
+    assert client.get("/products/?limit=100000").status_code == 422
+    assert client.get("/movements/?limit=0").status_code == 422
+
+
+def test_invalid_cursor(client):
+    """Test curseur invalide"""
+    response = client.get("/products/?cursor=not-a-cursor")
+    assert response.status_code == 400
@@ -0,0 +1,119 @@
+import asyncio
+import gc
+import time
+import anyio.to_thread
+import uuid
+import httpx
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from app.authentification import hashing
+from app.authentification.hashing import HashingPool
+from app.core.config import settings
+from app.db.async_database import get_async_engine
+from app.main import app
+from app.models import models
+
+
+def make_user(db, hashed_password):
+    name = f"hash-{uuid.uuid4().hex[:8]}"
+    user = models.User(
+        email=f"{name}@test.com", username=name, full_name=name,
+        hashed_password=hashed_password, role=models.UserRole.MANAGER, is_active=True,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_login_rehashes_on_cost_change(client, db):
+    """Test login : un hash d'un autre coût bcrypt est remplacé au coût courant"""
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+    user = make_user(db, old_hash)
+    response = client.post("/auth/login", data={"username": user.username, "password": "secret"})
+    assert response.status_code == 200
+    db.refresh(user)
+    assert user.hashed_password != old_hash
+    assert user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert user.last_login is not None
+
+    response = client.post("/auth/login", data={"username": user.username, "password": "wrong"})
+    assert response.status_code == 401
+
+
+def test_hashing_pool_is_bounded():
+    """Test pool bcrypt : file bornée, refus en 503 au-delà"""
+    pool = HashingPool(workers=1, max_queue=2)
+    futures = [pool.submit(time.sleep, 0.1) for _ in range(3)]
+    assert pool.stats()["active"] == 1
+    assert pool.stats()["queued"] == 2
+    with pytest.raises(HTTPException) as error:
+        pool.submit(time.sleep, 0)
+    assert error.value.status_code == 503
+    for future in futures:
+        future.result()
+    stats = pool.stats()
+    assert stats["completed"] == 3
+    assert stats["rejected"] == 1
+    assert stats["max_queued"] == 2
+    assert stats["queued"] == stats["active"] == 0
+
+
+@pytest.fixture
+def frozen_heap():
+    # Une collecte complète du GC pendant la rafale bloquerait la boucle au milieu des mesures
+    gc.collect()
+    gc.freeze()
+    yield
+    gc.unfreeze()
+
+
+@pytest.mark.anyio
+async def test_login_storm_leaves_threadpool_free(db, monkeypatch, frozen_heap):
+    """Test rafale de logins : les endpoints synchrones gardent leur latence"""
+    user = make_user(db, "unused")
+
+    def slow_verify(password, hashed_password):
+        time.sleep(0.1)
+        return True, None
+
+    # Plus de logins simultanés que de threads AnyIO (40) : sans pool dédié, "/" attendrait son tour
+    pool = HashingPool(workers=8, max_queue=200)
+    monkeypatch.setattr(hashing, "hashing_pool", pool)
+    monkeypatch.setattr(hashing.pwd_context, "verify_and_update", slow_verify)
+    # Pool async neuf, lié à la boucle de ce test (les précédents tournaient sur d'autres boucles)
+    await get_async_engine().dispose()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/")
+
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        borrowed = []
+
+        async def health_check(delay):
+            await asyncio.sleep(delay)
+            borrowed.append(limiter.borrowed_tokens)
+            start = time.perf_counter()
+            response = await client.get("/")
+            assert response.status_code == 200
+            return time.perf_counter() - start
+
+        logins = [
+            client.post("/auth/login", data={"username": user.username, "password": "x"}) for _ in range(120)
+        ]
+        results = await asyncio.gather(*logins, *(health_check(0.15 + i * 0.05) for i in range(20)))
+    responses, latencies = results[:120], results[120:]
+    assert [r.status_code for r in responses] == [200] * 120
+    assert pool.stats()["completed"] == 120
+    assert pool.stats()["max_queued"] > 40
+    assert max(borrowed) < 10
+    assert max(latencies) < 0.15
+    await get_async_engine().dispose()
+
+
+def test_password_hashing_stats_endpoint(client, admin):
+    """Test /internal/password-hashing : état du pool bcrypt"""
+    body = client.get("/internal/password-hashing").json()
+    assert body["workers"] == settings.PASSWORD_HASH_WORKERS
+    assert body["rounds"] == settings.BCRYPT_ROUNDS
+    assert {"queued", "active", "completed", "rejected", "max_queued", "wait_avg_ms"} <= body.keys()
@@ -0,0 +1,116 @@
+import asyncio
+import time
+import uuid
+import httpx
+import pytest
+from app.authentification import auth
+from app.authentification.auth import create_access_token
+from app.authentification.principals import principal_cache
+from app.main import app
+from app.models import models
+
+
+def make_user(db, role=models.UserRole.MANAGER):
+    name = f"principal-{uuid.uuid4().hex[:8]}"
+    user = models.User(
+        email=f"{name}@test.com", username=name, full_name=name,
+        hashed_password="x", role=role, is_active=True,
+    )
+    db.add(user)
+    db.commit()
+    token = create_access_token(data={"sub": user.username, "user_id": user.id})
+    return user, {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(autouse=True)
+def clear_principals():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+def users_queries(statements):
+    return [s for s in statements if "FROM users" in s]
+
+
+def test_warm_cache_skips_users_table(client, db, query_counter):
+    """Test auth : aucun SELECT sur users quand le principal est en cache"""
+    _, headers = make_user(db)
+    with query_counter() as statements:
+        assert client.get("/categories/", headers=headers).status_code == 200
+    assert len(users_queries(statements)) == 1
+    with query_counter() as statements:
+        assert client.get("/categories/", headers=headers).status_code == 200
+    assert users_queries(statements) == []
+
+
+def test_admin_changes_invalidate_principal(client, db):
+    """Test auth : désactivation et changement de rôle visibles immédiatement"""
+    _, admin_headers = make_user(db, role=models.UserRole.ADMIN)
+    user, headers = make_user(db)
+    assert client.get("/categories/", headers=headers).status_code == 200
+    assert client.get("/internal/cache", headers=headers).status_code == 403
+
+    response = client.put(f"/users/{user.id}", headers=admin_headers, json={
+        "email": user.email, "username": user.username, "full_name": user.full_name,
+        "role": "ADMIN", "password": "",
+    })
+    assert response.status_code == 200
+    assert client.get("/internal/cache", headers=headers).status_code == 200
+
+    assert client.delete(f"/users/{user.id}", headers=admin_headers).status_code == 200
+    response = client.get("/categories/", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_direct_deactivation_bounded_by_ttl(client, db, monkeypatch):
+    """Test auth : un utilisateur désactivé hors API est refusé après le TTL"""
+    monkeypatch.setattr(principal_cache, "ttl", 0.2)
+    user, headers = make_user(db)
+    assert client.get("/categories/", headers=headers).status_code == 200
+    user.is_active = False
+    db.commit()
+    assert client.get("/categories/", headers=headers).status_code == 200
+    time.sleep(0.25)
+    assert client.get("/categories/", headers=headers).status_code == 400
+
+
+@pytest.mark.anyio
+async def test_slow_user_lookup_does_not_block_loop(db, monkeypatch):
+    """Test auth : une lecture lente de users ne retarde pas les health checks concurrents"""
+    _, headers = make_user(db)
+    fetch = auth.fetch_principal
+
+    def slow_fetch(session, user_id):
+        time.sleep(0.5)
+        return fetch(session, user_id)
+
+    monkeypatch.setattr(auth, "fetch_principal", slow_fetch)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/")
+
+        start = time.perf_counter()
+
+        async def health_check(delay):
+            # Latence mesurée depuis l'heure prévue : inclut le temps où la boucle serait bloquée
+            await asyncio.sleep(delay)
+            response = await client.get("/")
+            assert response.status_code == 200
+            return time.perf_counter() - start - delay
+
+        async def authenticated():
+            await asyncio.sleep(0.1)
+            begin = time.perf_counter()
+            response = await client.get("/categories/", headers=headers)
+            return response, time.perf_counter() - begin
+
+        (response, elapsed), *latencies = await asyncio.gather(
+            authenticated(), *(health_check(i * 0.025) for i in range(30))
+        )
+        assert response.status_code == 200
+        assert elapsed >= 0.5
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    assert p99 < 0.2
@@ -0,0 +1,55 @@
+import uuid
+from app.models import models
+from app.routers import products as products_router
+
+
+def _upload(client, content):
+    return client.post(
+        "/products/import",
+        files={"file": ("catalogue.csv", content.encode("utf-8"), "text/csv")},
+    )
+
+
+def test_import_products_reports_row_errors(client, db, monkeypatch):
+    """Test import CSV : lignes valides insérées par lots, erreurs par ligne"""
+    monkeypatch.setattr(products_router, "IMPORT_BATCH_SIZE", 2)
+    category = models.ProductCategory(name=f"Import {uuid.uuid4().hex[:8]}")
+    db.add(category)
+    db.commit()
+    tag = uuid.uuid4().hex[:8]
+
+    content = "\n".join([
+        "name,description,price,quantity,category_id,category",
+        f"Import A {tag},Or,10.5,3,{category.id},",
+        f"Import B {tag},,abc,1,,",
+        f"Import C {tag},,12,,,{category.name}",
+        f"Import D {tag},,8,2,,Inconnue",
+        f"Import E {tag},,9,-1,,",
+        f"Import F {tag},,7,1,999999,",
+        f"Import G {tag},,5,4,,",
+    ])
+    response = _upload(client, content)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 3
+    assert report["failed"] == 4
+    assert [e["line"] for e in report["errors"]] == [3, 5, 6, 7]
+    assert "price" in report["errors"][0]["error"]
+
+    imported = db.query(models.Product).filter(models.Product.name.like(f"Import % {tag}")).all()
+    by_name = {p.name: p for p in imported}
+    assert set(by_name) == {f"Import A {tag}", f"Import C {tag}", f"Import G {tag}"}
+    assert by_name[f"Import C {tag}"].category_id == category.id
+    assert by_name[f"Import G {tag}"].category_id is None
+
+
+def test_import_products_are_searchable(client):
+    """Test import CSV : l'index de recherche suit les insertions par lots"""
+    assert _upload(client, "name,price\nPendentif Lazulinox,20\n").json()["imported"] == 1
+    results = client.get("/products/", params={"search": "lazulinox"}).json()
+    assert [p["name"] for p in results] == ["Pendentif Lazulinox"]
+
+
+def test_import_products_requires_columns(client):
+    """Test import CSV sans colonnes obligatoires"""
+    assert _upload(client, "title,cost\nX,1\n").status_code == 400
@@ -0,0 +1,35 @@
+import uuid
+import pytest
+from app.models import models
+
+
+@pytest.fixture
+def catalog(db):
+    suffix = uuid.uuid4().hex[:8]
+    categories = [models.ProductCategory(name=f"Catégorie N+1 {i} {suffix}") for i in range(3)]
+    db.add_all(categories)
+    db.commit()
+    db.add_all([
+        models.Product(name=f"Produit N+1 {i}", price=5, quantity=0, min_stock=5,
+                       category_id=categories[i % 3].id)
+        for i in range(30)
+    ])
+    db.commit()
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("/products/?limit=100", 2),
+    ("/products/?search=produit", 2),
+    ("/products/stock/low-stock?threshold=5", 2),
+    ("/dashboard/low-stock?threshold=5", 2),
+    ("/reports/alerts/low-stock", 3),  # + le total des alertes
+])
+def test_product_lists_load_categories_in_one_query(client, catalog, no_auth, query_counter, url, expected):
+    """Test : une liste de produits coûte 2 requêtes (produits + catégories)"""
+    with query_counter() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    body = response.json()
+    products = body["products"] if isinstance(body, dict) else body
+    assert any(p["category"] for p in products)
+    assert len(statements) == expected, statements
@@ -0,0 +1,59 @@
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from app.models import models
+
+
+@pytest.fixture
+def category(db):
+    category = models.ProductCategory(name=f"Rapports {uuid.uuid4().hex[:8]}")
+    db.add(category)
+    db.commit()
+    return category
+
+
+def _product(db, category, name, quantity, movements):
+    product = models.Product(name=name, price=1, quantity=quantity, category_id=category.id)
+    db.add(product)
+    db.commit()
+    db.add_all([
+        models.StockMovement(product_id=product.id, type=t, quantity=q, timestamp=ts)
+        for t, q, ts in movements
+    ])
+    db.commit()
+    return product.id
+
+
+def test_performance_ranks_by_turnover(client, db, no_auth, category):
+    """Test performance : classement par rotation, limite et filtre catégorie"""
+    IN, OUT = models.MovementType.IN, models.MovementType.OUT
+    recent = datetime.utcnow() - timedelta(days=2)
+    old = datetime.utcnow() - timedelta(days=90)
+    slow = _product(db, category, "Lent", 10, [(IN, 10, recent), (OUT, 1, recent)])
+    fast = _product(db, category, "Rapide", 4, [(OUT, 8, recent), (OUT, 50, old)])
+    idle = _product(db, category, "Immobile", 0, [])
+
+    response = client.get("/reports/performance", params={"category_id": category.id, "limit": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_entries"] == 10
+    assert data["total_exits"] == 9
+    assert data["net_change"] == 1
+    assert [p["product_id"] for p in data["product_performance"]] == [fast, slow]
+    assert data["product_performance"][0]["exits"] == 8
+    assert data["product_performance"][0]["turnover_rate"] == 2.0
+    assert data["product_performance"][1]["turnover_rate"] == 0.1
+
+    response = client.get("/reports/performance", params={"category_id": category.id})
+    ranking = response.json()["product_performance"]
+    assert ranking[-1] == {
+        "product_id": idle, "product_name": "Immobile", "current_stock": 0,
+        "entries": 0, "exits": 0, "turnover_rate": 0.0,
+    }
+
+
+def test_performance_is_two_queries(client, db, no_auth, category, query_counter):
+    """Test performance : nombre de requêtes indépendant du volume"""
+    with query_counter() as statements:
+        assert client.get("/reports/performance").status_code == 200
+    assert len(statements) == 2
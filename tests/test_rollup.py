@@ -0,0 +1,106 @@
+from datetime import datetime
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from app.db.counters import rebuild_counters
+from app.db.database import get_db
+from app.db.rollup import DETACHED_PRODUCT_ID, rebuild_rollup
+from app.main import app
+from app.models import models
+
+
+def _rollup(db, product_id):
+    db.expire_all()
+    rows = db.query(models.MovementDailyRollup).filter(models.MovementDailyRollup.product_id == product_id).all()
+    return {r.day.isoformat(): (r.entries, r.exits, r.entry_count, r.exit_count) for r in rows}
+
+
+def _product(db, quantity=0):
+    product = models.Product(name="Agrégat", price=1, quantity=quantity)
+    db.add(product)
+    db.commit()
+    return product.id
+
+
+def test_rollup_follows_movement_writes(client, db):
+    """Test agrégat mis à jour par POST /movements/ et /movements/bulk"""
+    product_id = _product(db)
+    client.post("/movements/", json={"product_id": product_id, "type": "IN", "quantity": 10})
+    client.post("/movements/", json={"product_id": product_id, "type": "OUT", "quantity": 3})
+    client.post("/movements/bulk", json=[
+        {"product_id": product_id, "type": "IN", "quantity": 2},
+        {"product_id": product_id, "type": "OUT", "quantity": 4},
+        {"product_id": product_id, "type": "OUT", "quantity": 100},  # refusé
+    ])
+    today = datetime.utcnow().date().isoformat()
+    assert _rollup(db, product_id) == {today: (12, 7, 2, 2)}
+
+
+def test_rollup_follows_orm_insert_and_delete(db):
+    """Test agrégat tenu à jour au flush de l'ORM"""
+    product_id = _product(db)
+    movement = models.StockMovement(product_id=product_id, type=models.MovementType.OUT, quantity=5,
+                                    timestamp=datetime(2019, 2, 3, 10))
+    db.add(movement)
+    db.commit()
+    assert _rollup(db, product_id) == {"2019-02-03": (0, 5, 0, 1)}
+
+    db.delete(movement)
+    db.commit()
+    assert _rollup(db, product_id) == {"2019-02-03": (0, 0, 0, 0)}
+
+
+def test_rebuild_rollup_matches_raw_movements(client, db):
+    """Test reconstruction complète de l'agrégat"""
+    product_id = _product(db)
+    # Insertion brute, hors ORM : l'agrégat ne la voit qu'après reconstruction
+    db.execute(insert(models.StockMovement), [
+        {"product_id": product_id, "type": models.MovementType.IN, "quantity": 7,
+         "timestamp": datetime(2019, 3, 1, 8)},
+        {"product_id": product_id, "type": models.MovementType.IN, "quantity": 1,
+         "timestamp": datetime(2019, 3, 1, 20)},
+    ])
+    db.commit()
+    params = {"product_id": product_id, "start_date": "2019-03-01", "end_date": "2019-03-01"}
+    assert client.get("/dashboard/chart/movements", params=params).json()["entries"] == [0]
+
+    rebuild_rollup(db)
+    rebuild_counters(db)
+    assert _rollup(db, product_id) == {"2019-03-01": (8, 0, 2, 0)}
+    assert client.get("/dashboard/chart/movements", params=params).json()["entries"] == [8]
+
+
+def test_delete_product_keeps_movement_history(client, db, no_auth):
+    """Test suppression d'un produit (clés étrangères appliquées) : ses mouvements restent dans les totaux"""
+    engine = create_engine("sqlite:///./test.db", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda conn, record: conn.execute("PRAGMA foreign_keys=ON"))
+    EnforcedSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def enforced_get_db():
+        session = EnforcedSession()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = enforced_get_db
+    try:
+        today = datetime.utcnow().date().isoformat()
+        detached = _rollup(db, DETACHED_PRODUCT_ID).get(today, (0, 0, 0, 0))
+        product_id = _product(db)
+        client.post("/movements/", json={"product_id": product_id, "type": "IN", "quantity": 4})
+        client.post("/movements/", json={"product_id": product_id, "type": "OUT", "quantity": 1})
+        assert _rollup(db, product_id) == {today: (4, 1, 1, 1)}
+
+        assert client.delete(f"/products/{product_id}").status_code == 200
+        assert _rollup(db, product_id) == {}
+        assert _rollup(db, DETACHED_PRODUCT_ID)[today] == tuple(a + b for a, b in zip(detached, (4, 1, 1, 1)))
+
+        daily = client.get("/reports/movements/daily").json()
+        assert daily["total_movements"] == len(daily["movements"])
+    finally:
+        engine.dispose()
+
+    # L'agrégat incrémental et la reconstruction complète coïncident
+    before = _rollup(db, DETACHED_PRODUCT_ID)
+    rebuild_rollup(db)
+    assert _rollup(db, DETACHED_PRODUCT_ID) == before
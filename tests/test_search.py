@@ -0,0 +1,72 @@
+def _create(client, name, description=None):
+    response = client.post(
+        "/products/create",
+        json={"name": name, "description": description, "price": 10, "quantity": 1, "category_id": None},
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def _search(client, term):
+    response = client.get("/products/", params={"search": term})
+    assert response.status_code == 200
+    return [p["id"] for p in response.json()]
+
+
+def test_search_ranks_name_before_description(client):
+    """Test classement : le nom pèse plus que la description"""
+    in_description = _create(client, "Bracelet Zircon", "Assorti au collier saphirine")
+    in_name = _create(client, "Collier Saphirine", "Or jaune")
+    results = _search(client, "saphirine")
+    assert results[:2] == [in_name, in_description]
+
+
+def test_search_matches_word_prefix(client):
+    """Test recherche par préfixe pendant la saisie"""
+    product_id = _create(client, "Montre Quartzelite")
+    assert product_id in _search(client, "quartz")
+    assert product_id in _search(client, "QUARTZELITE")
+
+
+def test_search_index_follows_update_and_delete(client):
+    """Test synchronisation de l'index à la modification et à la suppression"""
+    product_id = _create(client, "Broche Opalinex")
+    client.put(
+        f"/products/{product_id}",
+        json={"name": "Broche Turquonite", "price": 10, "quantity": 1, "category_id": None},
+    )
+    assert product_id not in _search(client, "opalinex")
+    assert product_id in _search(client, "turquonite")
+
+    client.delete(f"/products/{product_id}")
+    assert product_id not in _search(client, "turquonite")
+
+
+def test_search_ignores_query_syntax(client):
+    """Test termes contenant des caractères spéciaux"""
+    assert _search(client, '"*(') == []
+    assert isinstance(_search(client, 'bague OR "or'), list)
+
+
+def test_search_pages_with_cursor(client):
+    """Test pagination de la recherche : curseur (score, id), ni doublon ni page 1 répétée"""
+    ids = [_create(client, f"Bague Ambrelite {i}", "Ambrelite" if i % 2 else None) for i in range(5)]
+    expected = _search(client, "ambrelite")
+    assert sorted(expected) == sorted(ids)
+
+    pages, cursor = [], None
+    while True:
+        params = {"search": "ambrelite", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/products/", params=params)
+        assert response.status_code == 200
+        pages.append([p["id"] for p in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sum(pages, []) == expected
+
+    response = client.get("/products/", params={"search": "ambrelite", "cursor": "bad"})
+    assert response.status_code == 400
@@ -0,0 +1,55 @@
+import logging
+import re
+from app.core.config import settings
+from app.db.sql_stats import normalize_sql, statement_stats
+
+
+def test_normalize_sql():
+    """Test normalisation : littéraux, paramètres et listes regroupés"""
+    assert normalize_sql(
+        "SELECT * FROM products\n  WHERE id IN (?, ?, ?) AND name = 'a''b' LIMIT 10"
+    ) == "SELECT * FROM products WHERE id IN (?) AND name = ? LIMIT ?"
+    assert normalize_sql("INSERT INTO t (a, b) VALUES (%(a_m0)s, %(b_m0)s), (%(a_m1)s, %(b_m1)s)") == (
+        "INSERT INTO t (a, b) VALUES (?), ..."
+    )
+    assert normalize_sql("SELECT anon_1.id FROM bm25(products_fts, 10.0, 1.0)") == (
+        "SELECT anon_1.id FROM bm25(products_fts, ?, ?)"
+    )
+
+
+def test_server_timing_header(client, query_counter):
+    """Test Server-Timing : nombre et durée des requêtes SQL de l'appel"""
+    with query_counter() as statements:
+        response = client.get("/")
+    assert response.headers["server-timing"] == 'sql;dur=0.0;desc="0 queries"'
+    assert statements == []
+
+    with query_counter() as statements:
+        response = client.get("/products/?limit=5")
+    match = re.fullmatch(r'sql;dur=([\d.]+);desc="(\d+) queries"', response.headers["server-timing"])
+    assert match
+    assert int(match.group(2)) == len(statements) > 0
+
+
+def test_slow_query_logged_with_route(client, caplog, monkeypatch):
+    """Test journal des requêtes lentes : SQL normalisé, durée et route"""
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="app.sql.slow"):
+        client.get("/products/5")
+    records = [r.getMessage() for r in caplog.records if r.name == "app.sql.slow"]
+    assert records
+    assert all("route=/products/{product_id}" in message for message in records)
+    assert any("FROM products" in message and "products.id = ?" in message for message in records)
+
+
+def test_sql_stats_endpoint(client, admin):
+    """Test /internal/sql-stats : requêtes les plus coûteuses depuis le démarrage"""
+    statement_stats.clear()
+    for _ in range(3):
+        client.get("/products/?limit=5")
+    response = client.get("/internal/sql-stats?limit=5")
+    assert response.status_code == 200
+    top = response.json()
+    assert 0 < len(top) <= 5
+    assert [row["total_ms"] for row in top] == sorted((row["total_ms"] for row in top), reverse=True)
+    assert any(row["calls"] == 3 and row["statement"].startswith("SELECT") for row in top)
@@ -0,0 +1,85 @@
+import time
+import uuid
+import pytest
+from app.core.cache import MISSING, TTLCache
+from app.db.stats_cache import stats_cache
+from app.models import models
+
+
+def test_stats_served_from_cache(client, query_counter):
+    """Test stats : un second appel ne touche pas la base"""
+    first = client.get("/dashboard/stats").json()
+    with query_counter() as statements:
+        second = client.get("/dashboard/stats").json()
+    assert second == first
+    assert statements == []
+
+
+def test_stats_invalidated_by_write(client, db):
+    """Test stats : une écriture invalide le cache"""
+    before = client.get("/dashboard/stats").json()
+    db.add(models.Product(name=f"Cache {uuid.uuid4().hex[:8]}", price=1, quantity=7))
+    db.commit()
+    after = client.get("/dashboard/stats").json()
+    assert after["total_products"] == before["total_products"] + 1
+    assert after["total_stock"] == before["total_stock"] + 7
+
+
+def test_stats_not_invalidated_by_rollback(client, db):
+    """Test stats : une transaction annulée n'invalide pas le cache"""
+    from app.db.stats_cache import data_version
+    client.get("/dashboard/stats")
+    version = data_version()
+    db.add(models.Product(name=f"Annulé {uuid.uuid4().hex[:8]}", price=1, quantity=1))
+    db.flush()
+    db.rollback()
+    assert data_version() == version
+
+
+def test_ttl_cache_expiry_and_eviction():
+    """Test TTLCache : expiration et éviction LRU"""
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.stats()["evictions"] == 1
+    time.sleep(0.06)
+    assert cache.get("a") is MISSING
+
+
+def test_internal_cache_endpoint(client, admin):
+    """Test /internal/cache : compteurs hits / misses"""
+    client.get("/dashboard/stats")
+    before = client.get("/internal/cache").json()
+    client.get("/dashboard/stats")
+    after = client.get("/internal/cache").json()
+    assert after["hits"] == before["hits"] + 1
+    assert {"size", "maxsize", "ttl_seconds", "misses", "evictions", "version"} <= after.keys()
+
+
+@pytest.mark.parametrize("url", ["/dashboard/stats", "/movements/stats", "/reports/dashboard"])
+def test_stats_single_query(client, no_auth, query_counter, url):
+    """Test stats : une seule requête SQL, partagée entre les trois endpoints"""
+    stats_cache.clear()
+    with query_counter() as statements:
+        assert client.get(url).status_code == 200
+    assert len(statements) == 1, statements
+    with query_counter() as statements:
+        for other in ("/dashboard/stats", "/movements/stats", "/reports/dashboard"):
+            client.get(other)
+    assert statements == []
+
+
+def test_stats_values(client, db, no_auth):
+    """Test stats : valeurs identiques aux agrégats calculés séparément"""
+    from sqlalchemy import func
+    Product, Movement = models.Product, models.StockMovement
+    expected_value = db.query(func.sum(Product.price * Product.quantity)).scalar() or 0.0
+    expected_low = db.query(func.count(Product.id)).filter(Product.quantity < Product.min_stock).scalar()
+    expected_in = db.query(func.sum(Movement.quantity)).filter(Movement.type == "IN").scalar() or 0
+    report = client.get("/reports/dashboard").json()
+    assert report["total_stock_value"] == pytest.approx(expected_value)
+    assert report["low_stock_count"] == expected_low
+    assert client.get("/movements/stats").json()["total_entries"] == expected_in